@@ -7,7 +7,7 @@ import sys
 import streamlit as st
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from feature_engineering.lane_features import FEATURES_TO_TRAIN
-from utils.feature_feedback import suggest_target_value
+from utils.feature_feedback import suggest_target_value, good_probability, ResponseCurve, response_curve_path
 
    
 def clampBoolean(n): 
@@ -43,9 +43,11 @@ def is_value_reasonable_for_model(model, feature, value, suggested, full_row=Non
 def categorize_feature(feature):
     if feature in ['first_ward_time', 'first_item_after_4min_time', 'boots_purchase_time']:
         return "📍 Early Game"
-    elif feature in ['cs_diff_at_10', 'gold_diff_at_5', 'gold_diff_trend_5_to_10', 'avg_cs_per_min', 'fight_impact_score']:
+    elif feature in ['cs_diff_at_10', 'gold_diff_at_5', 'gold_diff_trend_5_to_10', 'avg_cs_per_min', 'fight_impact_score',
+                     'mid_lane_presence_to_14', 'avg_opp_distance_to_14']:
         return "🔄 Laning Phase"
-    elif feature in ['gold_diff_at_10', 'gold_diff_at_15', 'gold_diff_trend_10_to_15', 'first_teamfight_join_time']:
+    elif feature in ['gold_diff_at_10', 'gold_diff_at_15', 'gold_diff_trend_10_to_15', 'first_teamfight_join_time',
+                     'roam_count_to_14']:
         return "📈 Mid Game"
     else:
         return "🎯 Strategy"
@@ -68,10 +70,13 @@ def load_feature_types():
         return json.load(f)
 
 def load_feature_models():
+    """Each feature's response curve, or its pickled forest if it was trained before curves were exported."""
     models = {}
     for feature in FEATURES_TO_TRAIN:
         path = os.path.join("models", "feature_quality", f"{feature}_quality_model.pkl")
-        if os.path.exists(path):
+        if os.path.exists(response_curve_path(path)):
+            models[feature] = ResponseCurve.load(response_curve_path(path))
+        elif os.path.exists(path):
             models[feature] = joblib.load(path)
     return models
 
@@ -88,10 +93,7 @@ def give_feature_feedback(row, feature_models, feature_types):
         if pd.isnull(value):
             continue
 
-        formatted_input = pd.DataFrame([{feature: value}])
-        formatted_input = format_input_to_match_model(formatted_input, model.feature_names_in_)
-
-        probability = model.predict_proba(formatted_input)[0][1]  # Probability of class 1 (good)
+        probability = good_probability(model, feature, value)  # Probability of class 1 (good)
 
         ftype = feature_types.get(feature, "numeric")
         category = categorize_feature(feature)
@@ -143,12 +145,14 @@ def give_feature_feedback(row, feature_models, feature_types):
                 )
     return categorized_feedback
 
-def analyze_features_and_feedback():
+def analyze_features_and_feedback(df=None):
+    """Lane score and feedback for a one-row feature frame (default: single_match_row.csv)."""
     base_dir = os.path.dirname(__file__)
     model_path = os.path.join(base_dir, '..','..', 'models', 'lane_score_model.pkl')
     data_path = os.path.join(base_dir, '..','..', 'data', 'single_match_row.csv')
 
-    df = pd.read_csv(data_path)
+    if df is None:
+        df = pd.read_csv(data_path)
     model, expected_features = load_model_and_features(model_path)
     formatted_df = format_input_to_match_model(df.copy(), expected_features)
     prediction = model.predict(formatted_df)[0]
@@ -1,21 +1,34 @@
 import os
 import pandas as pd
-import joblib
 import sys
-import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from analysis.generate_single_match_row import main as generate_match_row
-from analysis.predict_lane_score import main as predict_lane_score
 from analysis.analyze_lane_score import analyze_features_and_feedback as analyze_features_and_feedback
+from feature_engineering.feature_rows import FEATURE_ROW_VERSION
+from utils.feature_store import get_feature_store
+from utils.riot_helpers import normalize_summoner
+
+def load_match_row(game_id: str, server: str, summoner: str):
+    """
+    The summoner's feature row for a match: served from the feature store when the
+    crawler (or an earlier analysis) already built it, otherwise computed from the API.
+    """
+    match_id = f"{server.upper()}_{game_id}"
+    stored = get_feature_store().find(match_id, normalize_summoner(summoner), FEATURE_ROW_VERSION)
+    if stored is not None:
+        print("📦 Step 1: Serving stored features...")
+        return pd.DataFrame([stored])
 
-def full_analysis_pipeline(game_id: str, server: str, summoner: str):
     print("📥 Step 1: Generating single match row...")
-    generate_match_row(game_id, server, summoner)
+    return generate_match_row(game_id, server, summoner)
 
-    print("\n📊 Step 2: Predicting lane score...")
-    predict_lane_score()
+def full_analysis_pipeline(game_id: str, server: str, summoner: str):
+    df = load_match_row(game_id, server, summoner)
+    if df is None:
+        raise ValueError("Could not build features for this match")
 
-    prediction, feedback = analyze_features_and_feedback()
+    print("\n📊 Step 2: Predicting lane score...")
+    prediction, feedback = analyze_features_and_feedback(df)
 
     return {
         "lane_score": prediction,
@@ -25,4 +38,4 @@ def full_analysis_pipeline(game_id: str, server: str, summoner: str):
 #if __name__ == "__main__":
     # Example input and output
     # result = full_analysis_pipeline("5282972169", "NA1", "Wallaby#Rito")
-    # print(result)
\ No newline at end of file
+    # print(result)
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.riot_helpers import normalize_summoner
+from utils.feature_extract_helper import is_boots, calculate_kda
+from utils.timeline_store import TimelineStore, DEFAULT_STORE_DIR
+from feature_engineering.parse_timeline import extract_features
+
+
+# Frozen copy of parse_timeline.extract_features before the single-pass engine.
+# It is the reference for the parity check; don't "fix" it.
+def legacy_extract_features(timeline_json, match_id, summoner, participant_id, opp_participant_id=None):
+    info = timeline_json['info']
+    frames = info['frames']
+    events = [e for frame in frames for e in frame['events']]
+
+    features = {
+        'summoner': normalize_summoner(summoner),
+        'match_id': match_id,
+        'champion': None,
+        'cs_at_10min': None,
+        'opp_cs_at_10min': None,
+        'first_ward_time': None,
+        'first_death_time': None,
+        'first_kill_or_assist_time': None,
+        'first_item_after_4min_id': None,
+        'first_item_after_4min_time': None,
+        'boots_purchase_time': None,
+        'first_teamfight_join_time': None,
+        'fight_impact_score': 0,
+        'avg_cs_per_min': None,
+        'game_length_minutes': None,
+        'kda': None,
+        'opp_kda': None,
+        'cs_diff_at_10': None,
+        'gold_diff_at_5': None,
+        'gold_diff_at_10': None,
+        'gold_diff_at_15': None,
+        'gold_diff_trend_5_to_10': None,
+        'gold_diff_trend_10_to_15': None,
+        'early_roam': False,
+        'has_early_lane_prio': False
+    }
+
+    if not frames:
+        return None
+
+    game_duration = frames[-1]['timestamp'] / 1000
+    features['game_length_minutes'] = round(game_duration / 60, 2)
+
+    final_cs = 0
+    kills = deaths = assists = 0
+    opp_kills = opp_deaths = opp_assists = 0
+
+    for frame in frames:
+        pf = frame.get('participantFrames', {}).get(str(participant_id))
+        opp_pf = frame.get('participantFrames', {}).get(str(opp_participant_id)) if opp_participant_id else None
+
+        if pf:
+            cs = pf.get('minionsKilled', 0) + pf.get('jungleMinionsKilled', 0)
+            if frame['timestamp'] >= 600000 and not features['cs_at_10min']:
+                features['cs_at_10min'] = cs
+            if frame == frames[-1]:
+                final_cs = cs
+
+        if opp_pf:
+            if frame['timestamp'] >= 600000 and not features['opp_cs_at_10min']:
+                features['opp_cs_at_10min'] = opp_pf.get('minionsKilled', 0) + opp_pf.get('jungleMinionsKilled', 0)
+
+    if game_duration > 0:
+        features['avg_cs_per_min'] = round(final_cs / (game_duration / 60), 2)
+
+    for event in events:
+        t = event['timestamp'] / 1000
+
+        if event['type'] == 'WARD_PLACED' and event.get('creatorId') == participant_id and not features['first_ward_time']:
+            features['first_ward_time'] = t
+
+        if event['type'] == 'CHAMPION_KILL':
+            if event.get('victimId') == participant_id:
+                if not features['first_death_time']:
+                    features['first_death_time'] = t
+                deaths += 1
+            if event.get('killerId') == participant_id:
+                if not features['first_kill_or_assist_time']:
+                    features['first_kill_or_assist_time'] = t
+                if not features['first_teamfight_join_time'] and len(event.get('assistingParticipantIds', [])) >= 2:
+                    features['first_teamfight_join_time'] = t
+                if t <= 900:
+                    features['fight_impact_score'] += 1
+                kills += 1
+            elif participant_id in event.get('assistingParticipantIds', []):
+                if not features['first_kill_or_assist_time']:
+                    features['first_kill_or_assist_time'] = t
+                if not features['first_teamfight_join_time'] and len(event.get('assistingParticipantIds', [])) >= 2:
+                    features['first_teamfight_join_time'] = t
+                if t <= 900:
+                    features['fight_impact_score'] += 1
+                assists += 1
+
+            # Opponent stats
+            if event.get('victimId') == opp_participant_id:
+                opp_deaths += 1
+            if event.get('killerId') == opp_participant_id:
+                opp_kills += 1
+            elif opp_participant_id in event.get('assistingParticipantIds', []):
+                opp_assists += 1
+
+        if event['type'] == 'ITEM_PURCHASED' and event.get('participantId') == participant_id:
+            item_id = event.get('itemId')
+            if t > 240 and not features['first_item_after_4min_id']:
+                features['first_item_after_4min_id'] = item_id
+                features['first_item_after_4min_time'] = t
+            if is_boots(item_id) and not features['boots_purchase_time']:
+                features['boots_purchase_time'] = t
+
+    # Final derived metrics
+    features['kda'] = calculate_kda(kills, assists, deaths)
+    features['opp_kda'] = calculate_kda(opp_kills, opp_assists, opp_deaths)
+
+    if features['cs_at_10min'] is not None and features['opp_cs_at_10min'] is not None:
+        features['cs_diff_at_10'] = features['cs_at_10min'] - features['opp_cs_at_10min']
+
+    # Gold diff at 10 min
+    for frame in frames:
+        ts = frame['timestamp']
+        pf = frame.get('participantFrames', {}).get(str(participant_id))
+        opp_pf = frame.get('participantFrames', {}).get(str(opp_participant_id))
+
+        if pf and opp_pf:
+            p_gold = pf.get('totalGold', 0)
+            opp_gold = opp_pf.get('totalGold', 0)
+            diff = p_gold - opp_gold
+
+            if ts >= 300000 and features.get('gold_diff_at_5') is None:
+                features['gold_diff_at_5'] = diff
+            if ts >= 600000 and features.get('gold_diff_at_10') is None:
+                features['gold_diff_at_10'] = diff
+            if ts >= 900000 and features.get('gold_diff_at_15') is None:
+                features['gold_diff_at_15'] = diff
+
+    if features['gold_diff_at_5'] is not None and features['gold_diff_at_10'] is not None:
+        features['gold_diff_trend_5_to_10'] = features['gold_diff_at_10'] - features['gold_diff_at_5']
+
+    if features['gold_diff_at_10'] is not None and features['gold_diff_at_15'] is not None:
+        features['gold_diff_trend_10_to_15'] = features['gold_diff_at_15'] - features['gold_diff_at_10']
+
+
+    # Early roam
+    if features['first_teamfight_join_time'] and features['first_teamfight_join_time'] <= 600:
+        features['early_roam'] = True
+
+    # Has early lane prio: any two of cs_diff > 10, gold_diff > 300, early roam
+    prio_flags = [
+        features['cs_diff_at_10'] is not None and features['cs_diff_at_10'] >= 10,
+        features['gold_diff_at_10'] is not None and features['gold_diff_at_10'] >= 300,
+        features['early_roam']
+    ]
+
+    features['has_early_lane_prio'] = prio_flags.count(True) >= 2
+
+    return features
+
+
+
+REDEFINED_SINCE_LEGACY = {'early_roam', 'has_early_lane_prio'}
+
+# Small synthetic timelines checked in so parity can be verified without Riot data:
+# a full game, one where a participant drops out of the frames and another never
+# farms, and a game that ends before 10 minutes
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'timelines.json')
+
+
+def load_fixture(path=FIXTURE_PATH):
+    with open(path, encoding='utf-8') as f:
+        return list(json.load(f).items())
+
+
+def player_pairs(timeline):
+    """Every participant paired with the participant five slots over, like a lane opponent."""
+    participants = [p['participantId'] for p in timeline['info'].get('participants', [])] or list(range(1, 11))
+    return [(pid, ((pid + 4) % 10) + 1) for pid in participants]
+
+
+def check_parity(timelines):
+    """Every player in every timeline must get identical features; returns (checked, mismatches)."""
+    mismatches = 0
+    checked = 0
+    for match_id, timeline in timelines:
+        for pid, opp in player_pairs(timeline):
+            expected = legacy_extract_features(timeline, match_id, 'bench#bench', pid, opp)
+            actual = extract_features(timeline, match_id, 'bench#bench', pid, opp)
+            # Features added since the legacy extractor have nothing to compare against, and
+            # early_roam (now positional) feeds has_early_lane_prio, so both are redefined
+            if expected and actual:
+                expected = {k: v for k, v in expected.items() if k not in REDEFINED_SINCE_LEGACY}
+                actual = {k: actual[k] for k in expected}
+            checked += 1
+            if expected != actual:
+                mismatches += 1
+                diff = {k: (expected.get(k), actual.get(k)) for k in expected if expected.get(k) != actual.get(k)}
+                print(f"❌ {match_id} participant {pid}: {diff}")
+    return checked, mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Feature engine throughput and parity against the pre-engine extractor")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    fixture = load_fixture()
+    checked, mismatches = check_parity(fixture)
+    print(f"🧪 Fixture parity: {checked - mismatches}/{checked} player extractions identical")
+
+    store = TimelineStore(args.store)
+    timelines = [(match_id, store.get(match_id)) for match_id in store.keys()[:args.limit]]
+    if timelines:
+        stored_checked, stored_mismatches = check_parity(timelines)
+        print(f"🔍 Parity: {stored_checked - stored_mismatches}/{stored_checked} player extractions identical")
+        mismatches += stored_mismatches
+    else:
+        print(f"ℹ️ No timelines in {args.store}; timing the fixture instead")
+        timelines = fixture
+
+    # Throughput: one (player, opponent) extraction per timeline, as the pipeline does.
+    # Repeats alternate between the two so a machine slowing down mid-run hits both alike.
+    extractors = [('legacy', legacy_extract_features), ('engine', extract_features)]
+    best = {name: float('inf') for name, _ in extractors}
+    for _ in range(args.repeat):
+        for name, fn in extractors:
+            start = time.perf_counter()
+            for match_id, timeline in timelines:
+                fn(timeline, match_id, 'bench#bench', 1, 6)
+            best[name] = min(best[name], time.perf_counter() - start)
+    results = {name: len(timelines) / seconds for name, seconds in best.items()}
+
+    for name, rate in results.items():
+        print(f"⚡ {name:<7} {rate:,.0f} timelines/s")
+    print(f"📈 Speedup: {results['engine'] / results['legacy']:.2f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'training')))
+from joblib import Parallel, delayed
+from utils.table_io import write_table
+from feature_engineering.schemas import LABELED_SCHEMA
+from feature_engineering.lane_features import FEATURES_TO_TRAIN
+from benchmarks.bench_table_io import synthetic_labeled
+from train_feature_quality_model import train_stat_quality_model
+from train_all_feature_quality_models import train_one
+
+
+def run_legacy(data_path, output_dir, label):
+    # One call per feature, each re-reading the table, one after another
+    for feature in FEATURES_TO_TRAIN:
+        train_stat_quality_model(data_path, feature, os.path.join(output_dir, f'{feature}.pkl'), label)
+
+
+def run_batch(df, output_dir, label, n_jobs):
+    tasks = [
+        delayed(train_one)(df[[feature, label]], feature, label, os.path.join(output_dir, f'{feature}.pkl'))
+        for feature in FEATURES_TO_TRAIN
+    ]
+    return list(Parallel(n_jobs=n_jobs)(tasks))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time feature-quality training: per-feature reloads vs one shared load")
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--n-jobs', type=int, nargs='+', default=[1, -1])
+    args = parser.parse_args(argv)
+
+    label = 'lane_score'
+    df = synthetic_labeled(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = write_table(df, 'labeled_data', LABELED_SCHEMA, data_dir=tmp)
+
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                start = time.perf_counter()
+                run_legacy(data_path, tmp, label)
+                results = [('legacy (reload per feature)', time.perf_counter() - start)]
+            finally:
+                sys.stdout = stdout
+
+        for n_jobs in args.n_jobs:
+            start = time.perf_counter()
+            run_batch(df, tmp, label, n_jobs)
+            results.append((f'shared load, n_jobs={n_jobs}', time.perf_counter() - start))
+
+    print(f"📊 {len(FEATURES_TO_TRAIN)} feature models on {args.rows} rows ({os.cpu_count()} CPUs)")
+    baseline = results[0][1]
+    for name, seconds in results:
+        print(f"{name:<30} {seconds:>8.2f}s {baseline / seconds:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from joblib import Parallel, delayed
+from sklearn.model_selection import KFold
+from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+from feature_engineering.labels import LABEL_COLUMNS
+from feature_engineering.feature_rows import load_training_frame, model_input_columns
+from training.lane_score_models import LANE_SCORE_MODELS, DEFAULT_MODEL, make_lane_score_model
+
+DEFAULT_LEADERBOARD_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'lane_score_model_leaderboard.csv')
+
+
+def fit_fold(name, X, y, train_idx, test_idx):
+    """Fits one candidate on one fold; returns (name, fit seconds, RMSE, MAE, R²) on the held-out part."""
+    model = make_lane_score_model(name)
+    start = time.perf_counter()
+    model.fit(X.iloc[train_idx], y[train_idx])
+    seconds = time.perf_counter() - start
+    predictions = model.predict(X.iloc[test_idx])
+    return (
+        name, seconds,
+        float(np.sqrt(mean_squared_error(y[test_idx], predictions))),
+        float(mean_absolute_error(y[test_idx], predictions)),
+        float(r2_score(y[test_idx], predictions)),
+    )
+
+
+def fit_full(name, X, y):
+    model = make_lane_score_model(name)
+    model.fit(X, y)
+    return name, model
+
+
+def serving_costs(model, X, repeats, batch_rows):
+    """
+    Single-row latency the way the app predicts (a one-row DataFrame per call),
+    batch throughput over batch_rows rows, and the pickled model size.
+    """
+    rows = np.random.default_rng(42).integers(0, len(X), size=repeats)
+    model.predict(X.iloc[[rows[0]]])  # warm-up
+    latencies = []
+    for i in rows:
+        row = X.iloc[[i]]
+        start = time.perf_counter()
+        model.predict(row)
+        latencies.append(time.perf_counter() - start)
+
+    batch = X.iloc[np.resize(np.arange(len(X)), batch_rows)]
+    start = time.perf_counter()
+    model.predict(batch)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'predict_ms_p50': float(np.percentile(latencies, 50) * 1000),
+        'predict_ms_p95': float(np.percentile(latencies, 95) * 1000),
+        'batch_rows_per_s': batch_rows / batch_seconds if batch_seconds > 0 else float('inf'),
+        'size_kb': len(pickle.dumps(model)) / 1024,
+    }
+
+
+def leaderboard(fold_results, costs):
+    folds = pd.DataFrame(fold_results, columns=['model', 'fit_s', 'rmse', 'mae', 'r2'])
+    board = folds.groupby('model').agg(
+        rmse=('rmse', 'mean'), rmse_std=('rmse', 'std'), mae=('mae', 'mean'), r2=('r2', 'mean'), fit_s=('fit_s', 'mean'),
+    )
+    board = board.join(pd.DataFrame.from_dict(costs, orient='index'))
+    return board.sort_values('rmse').reset_index().rename(columns={'index': 'model'})
+
+
+def print_leaderboard(board):
+    print(f"\n{'':2}{'model':<28} {'RMSE':>8} {'±':>6} {'MAE':>8} {'R²':>6} {'fit s':>7} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'rows/s':>10} {'size KB':>9}")
+    for r in board.itertuples():
+        marker = '* ' if r.model == DEFAULT_MODEL else '  '
+        print(f"{marker}{r.model:<28} {r.rmse:>8.3f} {r.rmse_std:>6.3f} {r.mae:>8.3f} {r.r2:>6.3f} {r.fit_s:>7.2f} "
+              f"{r.predict_ms_p50:>7.2f} {r.predict_ms_p95:>7.2f} {r.batch_rows_per_s:>10,.0f} {r.size_kb:>9,.0f}")
+    print(f"* current production model ({DEFAULT_MODEL})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare lane-score model families on cross-validated accuracy, training time and serving cost"
+    )
+    parser.add_argument('--label', choices=['lane_score'] + LABEL_COLUMNS, default='lane_score')
+    parser.add_argument('--curves', action='store_true', help='Include the per-minute lane differential curves')
+    parser.add_argument('--source', choices=['store', 'table'], default='store',
+                        help='Read rows from the feature store (default) or the labeled_data table')
+    parser.add_argument('--models', nargs='+', choices=list(LANE_SCORE_MODELS), default=list(LANE_SCORE_MODELS))
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--n-jobs', type=int, default=-1,
+                        help='Folds fitted at once (-1 = one per core); serving costs are always measured alone')
+    parser.add_argument('--repeats', type=int, default=200, help='Single-row predictions timed per model')
+    parser.add_argument('--batch-rows', type=int, default=10_000, help='Rows in the throughput batch')
+    parser.add_argument('--output', default=DEFAULT_LEADERBOARD_PATH, help='CSV the leaderboard is written to')
+    args = parser.parse_args(argv)
+
+    df = load_training_frame(args.source, curves=args.curves)
+    if df is None:
+        print("❌ The feature store has no current rows; run build_feature_store.py (or use --source table)")
+        return
+    df = df[df[args.label].notna()]
+    columns = model_input_columns(df, ['lane_score'] + LABEL_COLUMNS, curves=args.curves)
+    # One float matrix for every candidate: the linear models can't take pandas' nullable dtypes
+    X = pd.DataFrame(df[columns].to_numpy(dtype='float64', na_value=np.nan), columns=columns)
+    # A column that is never observed carries nothing and HistGradientBoosting can't bin it
+    empty = X.columns[X.isna().all()].tolist()
+    if empty:
+        print(f"⚠️ Dropping {len(empty)} column(s) with no values: {', '.join(empty)}")
+        X = X.drop(columns=empty)
+        columns = list(X.columns)
+    y = df[args.label].to_numpy(dtype='float64')
+    print(f"📂 {len(X)} rows × {len(columns)} features; {len(args.models)} models × {args.folds} folds "
+          f"with n_jobs={args.n_jobs} ({os.cpu_count()} CPUs)")
+
+    splits = list(KFold(n_splits=args.folds, shuffle=True, random_state=42).split(X))
+    start = time.perf_counter()
+    fold_results = Parallel(n_jobs=args.n_jobs)(
+        delayed(fit_fold)(name, X, y, train_idx, test_idx) for name in args.models for train_idx, test_idx in splits
+    )
+    fitted = Parallel(n_jobs=args.n_jobs)(delayed(fit_full)(name, X, y) for name in args.models)
+    print(f"⏱️ Cross-validation and full fits took {time.perf_counter() - start:.2f}s")
+
+    # Timed in this process one model at a time, so parallel fits don't skew latencies
+    costs = {name: serving_costs(model, X, args.repeats, args.batch_rows) for name, model in fitted}
+
+    board = leaderboard(fold_results, costs)
+    print_leaderboard(board)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    board.to_csv(args.output, index=False)
+    print(f"💾 Leaderboard saved to {os.path.abspath(args.output)}")
+    print("ℹ️ Train the pick with: python src/training/train_lane_score_model.py --model <name>")
+
+
+if __name__ == '__main__':
+    main()
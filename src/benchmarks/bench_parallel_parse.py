@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.timeline_store import TimelineStore, DEFAULT_STORE_DIR
+from feature_engineering.parse_timeline import parse_all
+
+
+def run(jobs, workers, chunksize, store_dir):
+    start = time.perf_counter()
+    results = [(features, None if curves is None else curves.tobytes(), error) for _, features, curves, error in
+               parse_all(jobs, workers=workers, chunksize=chunksize, store_dir=store_dir)]
+    return results, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel timeline parsing: throughput per worker count and output order")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--workers', default=None, help='Comma-separated worker counts (default 1,2,4,... up to the CPU count)')
+    parser.add_argument('--chunksize', type=int, default=16)
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(',')]
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+
+    store = TimelineStore(args.store)
+    jobs = [('bench#bench', match_id, 1, 6) for match_id in store.keys()[:args.limit]]
+    store.close()
+
+    baseline, serial_seconds = run(jobs, 1, args.chunksize, args.store)
+    print(f"📊 {len(jobs)} timelines from {args.store} on {cpus} CPU(s)")
+    print(f"{'workers':>8} {'timelines/s':>12} {'speedup':>8} {'same output':>12}")
+    for workers in counts:
+        results, seconds = (baseline, serial_seconds) if workers == 1 else run(jobs, workers, args.chunksize, args.store)
+        print(f"{workers:>8} {len(jobs) / seconds:>12,.0f} {serial_seconds / seconds:>7.2f}x "
+              f"{'yes' if results == baseline else 'NO':>12}")
+        if results != baseline:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
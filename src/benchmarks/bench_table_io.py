@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.table_io import write_table, read_table, apply_schema, HAVE_PARQUET
+from feature_engineering.schemas import LABELED_SCHEMA
+
+
+def synthetic_labeled(rows, seed=0):
+    """A labeled_data-shaped frame with plausible values in every column."""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for column, dtype in LABELED_SCHEMA.items():
+        if dtype == 'string':
+            columns[column] = [f"{column}_{i % 500}" for i in range(rows)]
+        elif dtype == 'boolean':
+            columns[column] = rng.random(rows) < 0.5
+        elif dtype == 'Int64':
+            values = pd.array(rng.integers(-2000, 2000, rows), dtype='Int64')
+            values[rng.random(rows) < 0.05] = pd.NA
+            columns[column] = values
+        else:
+            values = rng.random(rows) * 1000
+            values[rng.random(rows) < 0.05] = np.nan
+            columns[column] = values
+    for role in ['assassin', 'mage', 'fighter']:
+        columns[f'champion_role_{role}'] = (rng.random(rows) < 0.33).astype(float)
+    return apply_schema(pd.DataFrame(columns), LABELED_SCHEMA)
+
+
+def time_read(name, schema, data_dir, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = read_table(name, schema, data_dir)
+        best = min(best, time.perf_counter() - start)
+    return best, df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typed load time of a labeled table: CSV vs Parquet")
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if not HAVE_PARQUET:
+        print("❌ pyarrow is not installed; Parquet is unavailable")
+        sys.exit(1)
+
+    df = synthetic_labeled(args.rows)
+    print(f"📊 {args.rows:,} rows × {df.shape[1]} columns")
+    results = {}
+    for fmt in ['csv', 'parquet']:
+        with tempfile.TemporaryDirectory() as data_dir:
+            path = write_table(df, 'labeled_data', LABELED_SCHEMA, fmt, data_dir)
+            size = os.path.getsize(path)
+            seconds, loaded = time_read('labeled_data', LABELED_SCHEMA, data_dir, args.repeat)
+            pd.testing.assert_frame_equal(loaded, df)
+        results[fmt] = seconds
+        print(f"{fmt:<8} load {seconds * 1000:>8.0f} ms   {size / 2 ** 20:>7.1f} MB   dtypes identical")
+    print(f"📈 Parquet loads {results['csv'] / results['parquet']:.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
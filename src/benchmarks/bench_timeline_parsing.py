@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tracemalloc
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.timeline_store import TimelineStore, DEFAULT_STORE_DIR
+from utils.timeline_stream import iter_frames
+from feature_engineering.parse_timeline import extract_features, extract_features_streaming
+
+MODES = ['full', 'streaming']
+
+
+def max_rss_bytes():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def parse_one(store, mode, match_id):
+    if mode == 'streaming':
+        frames = iter_frames(store.iter_chunks(match_id))
+        return extract_features_streaming(frames, match_id, 'bench#bench', 1, 6)
+    return extract_features(store.get(match_id), match_id, 'bench#bench', 1, 6)
+
+
+def run_child(store_dir, mode, limit):
+    store = TimelineStore(store_dir)
+    match_ids = store.keys()[:limit]
+    rss_before = max_rss_bytes()
+
+    start = time.perf_counter()
+    for match_id in match_ids:
+        parse_one(store, mode, match_id)
+    elapsed = time.perf_counter() - start
+    rss_after = max_rss_bytes()
+
+    # Second pass under tracemalloc: the heaviest single timeline's allocation peak
+    tracemalloc.start()
+    worst_peak = 0
+    for match_id in match_ids:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        parse_one(store, mode, match_id)
+        worst_peak = max(worst_peak, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    print(json.dumps({
+        'mode': mode,
+        'timelines': len(match_ids),
+        'ms_per_timeline': round(elapsed * 1000 / max(len(match_ids), 1), 2),
+        'peak_rss_growth_mb': round((rss_after - rss_before) / 2 ** 20, 2),
+        'peak_rss_mb': round(rss_after / 2 ** 20, 2),
+        'worst_timeline_alloc_mb': round(worst_peak / 2 ** 20, 2),
+    }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare peak memory and time per timeline: full load vs streaming")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.store, args.child, args.limit)
+        return
+
+    # Each mode runs in a fresh interpreter so peak RSS isn't shared between them
+    results = []
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, __file__, '--store', args.store, '--limit', str(args.limit), '--child', mode],
+            check=True, capture_output=True, text=True
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"📊 Timeline parsing over {results[0]['timelines']} timelines from {args.store}")
+    print(f"{'mode':<10} {'ms/timeline':>12} {'peak RSS MB':>12} {'RSS growth MB':>14} {'worst alloc MB':>15}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['ms_per_timeline']:>12} {r['peak_rss_mb']:>12} "
+              f"{r['peak_rss_growth_mb']:>14} {r['worst_timeline_alloc_mb']:>15}")
+
+
+if __name__ == '__main__':
+    main()
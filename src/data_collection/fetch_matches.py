@@ -1,146 +1,345 @@
 import os
-import csv
+import json
 import time
-import requests
-from dotenv import load_dotenv
+import argparse
+import threading
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-load_dotenv()
-API_KEY = os.getenv("RIOT_API_KEY")
-HEADERS = {"X-Riot-Token": API_KEY}
-REGION = 'na1'
-ROUTING = 'americas'
+from utils.riot_helpers import (
+    get_client, get_puuid_by_riot_id, get_match_ids, get_match_data, build_match_row,
+    parse_roster_line, region_for_platform, region_for_match_id
+)
+from utils.match_store import get_match_store
+from utils.pipeline_metrics import record_rows
 
+PAGE_SIZE = 100  # Riot's maximum for match IDs by PUUID
+ROSTER_PATH = os.path.join(os.path.dirname(__file__), 'summoners.txt')
+STATE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'crawl_state.json')
+CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'crawl_checkpoint.json')
 
-def get_puuid_by_riot_id(game_name, tag_line):
-    url = f"https://{ROUTING}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-    res = requests.get(url, headers=HEADERS)
-    if res.status_code != 200:
-        print(f"❌ Error getting Riot ID {game_name}#{tag_line}: {res.status_code}")
-        return None
-    return res.json()['puuid']
-
+def load_crawl_state(path):
+    """
+    Crawl state survives between runs:
+    - puuids: Riot ID → PUUID, so known summoners cost no account lookup
+    - watermarks: PUUID → newest match seen (match ID and its start time in epoch seconds),
+      plus resume_start/resume_newest while a --max-per-run capped listing has older matches to list
+    """
+    if not os.path.exists(path):
+        return {'puuids': {}, 'watermarks': {}}
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    state.setdefault('puuids', {})
+    state.setdefault('watermarks', {})
+    return state
 
-def get_match_ids(puuid, count=50):
-    url = f'https://{ROUTING}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?type=ranked&start=0&count={count}'
-    res = requests.get(url, headers=HEADERS)
-    if res.status_code != 200:
-        print(f"❌ Error fetching match IDs for PUUID: {res.status_code}")
-        return []
-    return res.json()
 
+def save_crawl_state(path, state):
+    # Write-then-rename, so a crash mid-write leaves the previous file intact
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
 
-def get_match_info(match_id, riot_id_full):
-    url = f'https://{ROUTING}.api.riotgames.com/lol/match/v5/matches/{match_id}'
-    res = requests.get(url, headers=HEADERS)
-
-    if res.status_code != 200:
-        print(f"❌ Error fetching match {match_id}: {res.status_code}")
-        return None
 
-    data = res.json()
-    info = data['info']
-    participants = info['participants']
+def new_checkpoint(args):
+    """
+    Progress of one crawl, saved as it goes so --resume can continue it:
+    - discovered: Riot ID → [PUUID, new match IDs, resume_start], for summoners already paged through
+    - skipped: [Riot ID, match ID] jobs that were fetched but aren't midlane rows
+    - failed: [Riot ID, match ID] jobs whose fetch failed; retried on resume
+    - stored: rows committed so far, for progress reporting
+    Fetched rows themselves are committed to the match store, so they're never
+    in the checkpoint; a resumed crawl skips them because they're recorded.
+    """
+    return {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'options': {'max_new': args.max_new, 'max_per_run': args.max_per_run, 'full': args.full},
+        'discovered': {},
+        'skipped': [],
+        'failed': [],
+        'stored': 0,
+        'jobs': 0,
+    }
 
-    if "#" not in riot_id_full:
-        print(f"❌ Invalid Riot ID format: {riot_id_full}")
-        return None
 
-    game_name, tag_line = riot_id_full.split("#")
-    this_player = None
-    opponent_mid = None
-
-    for p in participants:
-        if (
-            p.get('riotIdGameName', '').lower() == game_name.lower() and
-            p.get('riotIdTagline', '').lower() == tag_line.lower()
-        ):
-            if p['lane'] != 'MIDDLE':
-                return None  # Skip if not a mid lane game
-            this_player = p
-            break
-
-    if not this_player:
-        print(f"❌ Summoner {riot_id_full} not found in match {match_id}")
+def load_checkpoint(path=CHECKPOINT_PATH):
+    if not os.path.exists(path):
         return None
+    with open(path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    for entry in checkpoint['discovered'].values():
+        if len(entry) == 2:
+            entry.append(None)  # Checkpoints from before listings could be cut short
+    return checkpoint
 
-    for p in participants:
-        if p['lane'] == 'MIDDLE' and p['teamId'] != this_player['teamId']:
-            opponent_mid = p
-            break
 
-    opp_riot_id = (
-        f"{opponent_mid.get('riotIdGameName')}#{opponent_mid.get('riotIdTagline')}"
-        if opponent_mid else None
-    )
+def get_match_info(match_id, riot_id_full):
+    data = get_match_data(match_id)
+    if not data:
+        print(f"❌ Error fetching match {match_id}")
+        return None
+    return build_match_row(data, riot_id_full)
 
-    return {
-        'match_id': match_id,
-        'champion': this_player['championName'],
-        'participant_id': this_player['participantId'],
-        'opp_participant_id': opponent_mid['participantId'] if opponent_mid else None,
-        'win': this_player['win'],
-        'kills': this_player['kills'],
-        'deaths': this_player['deaths'],
-        'assists': this_player['assists'],
-        'cs': this_player['totalMinionsKilled'] + this_player['neutralMinionsKilled'],
-        'duration': info['gameDuration'],
-        'opp_kills': opponent_mid['kills'] if opponent_mid else 0,
-        'opp_deaths': opponent_mid['deaths'] if opponent_mid else 1,
-        'opp_assists': opponent_mid['assists'] if opponent_mid else 0,
-        'opp_cs': opponent_mid['totalMinionsKilled'] + opponent_mid['neutralMinionsKilled'] if opponent_mid else 0,
-        'opp_champion': opponent_mid['championName'] if opponent_mid else '',
-        'opp_summoner': opp_riot_id
-    }
 
+def list_new_match_ids(puuid, watermark, max_new, region=None):
+    """
+    Pages through a summoner's ranked match IDs, newest first, stopping at the
+    watermark; a watermark with resume_start continues a listing an earlier run
+    cut short. Returns (IDs, resume_start): resume_start is None once the listing
+    reached the watermark or the end of the history, otherwise the offset to carry
+    on from after max_new IDs. (None, None) if a page can't be fetched: an error
+    isn't the end of the history.
+    """
+    start_time = watermark.get('start_time') if watermark else None
+    last_match_id = watermark.get('last_match_id') if watermark else None
 
-def main():
-    base_dir = os.path.dirname(__file__)
-    file_path = os.path.join(base_dir, 'summoners.txt')
-    output_path = os.path.join(base_dir, '..', '..', 'data', 'midlane_matches.csv')
+    new_ids = []
+    start = watermark.get('resume_start', 0) if watermark else 0
+    while len(new_ids) < max_new:
+        count = min(PAGE_SIZE, max_new - len(new_ids))
+        page = get_match_ids(puuid, start=start, count=count, start_time=start_time, region=region)
+        if page is None:
+            return None, None
+        for match_id in page:
+            if match_id == last_match_id:
+                return new_ids, None
+            new_ids.append(match_id)
+        if len(page) < count:
+            return new_ids, None
+        start += count
+    return new_ids, start
 
-    with open(file_path) as f:
-        summoners = [line.strip() for line in f if line.strip()]
 
-    results = []
+def load_roster(path=ROSTER_PATH):
+    """Valid Riot IDs from the roster file, in file order, and the regional cluster of each."""
+    with open(path) as f:
+        summoners = [parse_roster_line(line) for line in f if line.strip()]
 
-    for riot_id in summoners:
+    valid = []
+    regions = {}
+    for riot_id, platform in summoners:
         if "#" not in riot_id:
             print(f"⚠️ Invalid Riot ID format: {riot_id}")
             continue
+        try:
+            regions[riot_id] = region_for_platform(platform)
+        except ValueError as e:
+            print(f"⚠️ {e} for {riot_id}")
+            continue
+        valid.append(riot_id)
+    return valid, regions
 
-        game_name, tag_line = riot_id.split("#")
-        print(f"\n🔍 Looking up: {game_name}#{tag_line}")
 
-        puuid = get_puuid_by_riot_id(game_name, tag_line)
+def discover_new_matches(riot_id, region, state, state_lock, max_new, max_per_run):
+    """
+    (puuid, new match IDs newest first, resume_start) for one summoner; (None, [], None)
+    if the Riot ID can't be resolved and (puuid, None, None) if its match list couldn't
+    be paged through. resume_start is set when a known summoner has more new matches
+    than max_per_run: the rest are listed by later runs (see advance_watermarks).
+    A first-time summoner's history is cut at max_new for good.
+    """
+    game_name, tag_line = riot_id.split("#")
+    with state_lock:
+        puuid = state['puuids'].get(riot_id)
+    if not puuid:
+        print(f"\n🔍 Looking up: {game_name}#{tag_line} ({region})")
+        puuid = get_puuid_by_riot_id(game_name, tag_line, region=region)
         if not puuid:
+            print(f"❌ Error getting Riot ID {game_name}#{tag_line}")
+            return None, [], None
+        with state_lock:
+            state['puuids'][riot_id] = puuid
+
+    with state_lock:
+        watermark = state['watermarks'].get(puuid)
+    match_ids, resume_start = list_new_match_ids(
+        puuid, watermark, max_per_run if watermark else max_new, region=region
+    )
+    if not watermark:
+        return puuid, match_ids, None
+    if resume_start is not None:
+        print(f"⏩ {riot_id}: listed {len(match_ids)} new matches (--max-per-run); older ones follow next run")
+    return puuid, match_ids, resume_start
+
+
+def _watermark_at(match_id):
+    data = get_match_data(match_id)  # served from the response cache
+    if not data:
+        return None
+    return {'last_match_id': match_id, 'start_time': data['info']['gameStartTime'] // 1000}
+
+
+def advance_watermarks(state, discovered, done):
+    """
+    Moves each summoner's watermark over the matches that are accounted for.
+    done holds the (Riot ID, match ID) jobs that were stored or skipped as not
+    midlane. Nothing below a watermark is listed again, so it stops above the
+    oldest match that isn't done; if that is the oldest one found, it stays put.
+
+    A listing cut short by --max-per-run (resume_start set) didn't reach the
+    watermark, so once everything listed is done the watermark stays and records
+    where the next run carries on (resume_start) and the newest match listed
+    (resume_newest). When the listing catches up, the watermark moves to that
+    newest match. Matches played in the meantime shift the offsets, which only
+    makes the next listing overlap the last one.
+    """
+    for riot_id, (puuid, match_ids, resume_start) in discovered.items():
+        if not puuid or match_ids is None:
+            continue
+        watermark = state['watermarks'].get(puuid)
+        not_done = [i for i, match_id in enumerate(match_ids) if (riot_id, match_id) not in done]
+
+        if resume_start is not None:
+            if not not_done:
+                if 'resume_newest' not in watermark:
+                    newest = _watermark_at(match_ids[0])
+                    if newest is None:
+                        continue
+                    watermark['resume_newest'] = newest
+                watermark['resume_start'] = resume_start
+            continue
+        if not not_done and watermark and 'resume_newest' in watermark:
+            state['watermarks'][puuid] = watermark['resume_newest']
             continue
 
-        match_ids = get_match_ids(puuid, count=50)
-        time.sleep(1)
+        newest_done = not_done[-1] + 1 if not_done else 0
+        if newest_done == len(match_ids):
+            continue
+        moved = _watermark_at(match_ids[newest_done])
+        if moved:
+            state['watermarks'][puuid] = moved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally fetch midlane matches for the summoner roster")
+    parser.add_argument('--max-new', type=int, default=200,
+                        help='How far back to crawl for summoners seen for the first time')
+    parser.add_argument('--max-per-run', type=int, default=1000,
+                        help='Cap on new matches per known summoner in one run; older ones follow in later runs')
+    parser.add_argument('--full', action='store_true', help='Ignore watermarks and recrawl from scratch')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the last interrupted crawl from its checkpoint')
+    parser.add_argument('--checkpoint-every', type=int, default=50,
+                        help='Matches fetched between commits of rows and crawl progress')
+    args = parser.parse_args(argv)
+
+    valid, regions = load_roster()
+
+    state = load_crawl_state(STATE_PATH)
+    checkpoint = load_checkpoint() if args.resume else None
+    if args.resume and checkpoint is None:
+        print("ℹ️ No interrupted crawl to resume; starting a new one")
+    elif checkpoint is None and os.path.exists(CHECKPOINT_PATH):
+        print("⚠️ Discarding the checkpoint of an interrupted crawl (use --resume to continue it)")
+    if checkpoint is None:
+        checkpoint = new_checkpoint(args)
+    else:
+        print(f"🔁 Resuming crawl from {checkpoint['started_at']}: {len(checkpoint['discovered'])} summoners "
+              f"discovered, {checkpoint['stored'] + len(checkpoint['skipped'])}/{checkpoint['jobs']} matches done")
+        # Same crawl, same options: they decide which matches were discovered
+        for option, value in checkpoint['options'].items():
+            setattr(args, option, value)
 
-        for match_id in match_ids:
-            match_info = get_match_info(match_id, riot_id)
-            if match_info:
-                results.append({'summoner': riot_id, **match_info})
-            time.sleep(1.2)
+    if args.full:
+        state['watermarks'] = {}
+    state_lock = threading.Lock()
+    store = get_match_store()
+    recorded = store.existing_keys()
+    discovered = checkpoint['discovered']
+    skipped = {tuple(job) for job in checkpoint['skipped']}
+    failed = {tuple(job) for job in checkpoint.get('failed', [])}
 
-    fieldnames = [
-        'summoner', 'match_id', 'champion', 'participant_id', 'opp_participant_id', 'win',
-        'kills', 'deaths', 'assists', 'cs', 'duration',
-        'opp_kills', 'opp_deaths', 'opp_assists', 'opp_cs',
-        'opp_champion', 'opp_summoner'
+    def discover(riot_id):
+        return discover_new_matches(riot_id, regions[riot_id], state, state_lock, args.max_new, args.max_per_run)
+
+    def fetch(job):
+        riot_id, match_id = job
+        data = get_match_data(match_id)
+        if not data:
+            print(f"❌ Error fetching match {match_id}")
+            return None, False
+        return build_match_row(data, riot_id), True
+
+    client = get_client()
+
+    # Each region crawls on its own pool and rate budget, so clusters run side by side
+    pending = [riot_id for riot_id in valid if riot_id not in discovered]
+    for riot_id, (puuid, match_ids, resume_start) in client.map(
+        discover, pending, region_of=regions.get, failure=(None, None, None)
+    ):
+        if match_ids is None:
+            print(f"❌ Couldn't list the matches of {riot_id}; it's retried on the next run")
+        elif puuid:
+            discovered[riot_id] = [puuid, match_ids, resume_start]
+            save_crawl_state(CHECKPOINT_PATH, checkpoint)
+
+    jobs = [
+        (riot_id, match_id)
+        for riot_id in valid
+        for match_id in (discovered.get(riot_id) or (None, []))[1]
+        if (riot_id, match_id) not in recorded and (riot_id, match_id) not in skipped
     ]
+    checkpoint['jobs'] = checkpoint['stored'] + len(skipped) + len(jobs)
+    print(f"\n📥 Fetching {len(jobs)} new matches for {len(valid)} summoners")
+
+    # Rows are committed and progress checkpointed every batch, so a crash loses at most one batch
+    stored = 0
+    try:
+        for start in range(0, len(jobs), args.checkpoint_every):
+            batch = jobs[start:start + args.checkpoint_every]
+            found = {}
+            batch_failed = 0
+            try:
+                for job, (match_info, fetched) in client.map(
+                    fetch, batch, region_of=lambda job: region_for_match_id(job[1]), failure=(None, False)
+                ):
+                    if match_info:
+                        found[job] = {'summoner': job[0], **match_info}
+                        failed.discard(job)
+                    elif fetched:
+                        skipped.add(job)
+                        failed.discard(job)
+                    else:
+                        failed.add(job)
+                        batch_failed += 1
+            finally:
+                # Keep the summoner/match order stable regardless of completion order
+                results = [found[job] for job in batch if job in found]
+                store.upsert_many(results)
+                stored += len(results)
+                checkpoint['stored'] += len(results)
+                checkpoint['skipped'] = [list(job) for job in sorted(skipped)]
+                checkpoint['failed'] = [list(job) for job in sorted(failed)]
+                save_crawl_state(CHECKPOINT_PATH, checkpoint)
 
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
+            if batch_failed == len(batch):
+                record_rows(rows_in=len(jobs), rows_out=stored, skipped=len(skipped))
+                print(f"\n❌ Every match in the last batch failed to download (expired API key?). "
+                      f"{stored} rows saved; rerun with --resume to continue.")
+                client.report()
+                return
+    except KeyboardInterrupt:
+        print(f"\n⏸️ Crawl interrupted; {checkpoint['stored']} rows saved so far. Rerun with --resume to continue.")
+        raise SystemExit(130)
 
-    print(f"\n✅ Saved {len(results)} matches to {output_path}")
+    record_rows(rows_in=len(jobs), rows_out=stored, skipped=len(skipped))
+
+    # Watermarks and the checkpoint stay put until every match is stored or skipped
+    if failed:
+        print(f"\n⚠️ Stored {stored} new matches, but {len(failed)} failed to download. "
+              f"Rerun with --resume to retry them.")
+        client.report()
+        return
+
+    # Advance watermarks only after the rows are safely stored, and never past a failed fetch
+    advance_watermarks(state, discovered, store.existing_keys() | skipped)
+    save_crawl_state(STATE_PATH, state)
+    os.remove(CHECKPOINT_PATH)
+
+    print(f"\n✅ Stored {stored} new matches ({store.count()} total) in {store.db_path}")
+    client.report()
 
 
 if __name__ == '__main__':
     main()
-
@@ -1,44 +1,44 @@
 import os
-import csv
-import json
-import time
-from dotenv import load_dotenv
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from utils.riot_helpers import get_timeline_data
-
-load_dotenv()
-API_KEY = os.getenv("RIOT_API_KEY")
-HEADERS = {"X-Riot-Token": API_KEY}
+from utils.riot_helpers import get_client, get_timeline_data, region_for_match_id
+from utils.timeline_store import get_timeline_store
+from utils.match_store import get_match_store
+from utils.pipeline_metrics import record_rows
 
 def main():
-    # CSV source
-    matches_path = os.path.join(os.path.dirname(__file__), '..','..', 'data', 'midlane_matches.csv')
-    output_dir = os.path.join(os.path.dirname(__file__), '..','..', 'data', 'timelines')
-    os.makedirs(output_dir, exist_ok=True)
-
-    with open(matches_path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-
-        for row in reader:
-            match_id = row['match_id']
-            summoner = row['summoner'].replace(" ", "_").replace("#", "-")  # clean file-safe name
-
-            output_filename = f"{summoner}__{match_id}_timeline.json"
-            output_path = os.path.join(output_dir, output_filename)
-
-            if os.path.exists(output_path):
-                print(f"⏩ Skipping (already downloaded): {output_filename}")
-                continue
-
-            print(f"🔎 Fetching: {output_filename}")
-            timeline = get_timeline_data(match_id)
-            if timeline:
-                with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                    json.dump(timeline, f, indent=2)
-                print(f"✅ Saved: {output_filename}")
-
-            time.sleep(1.5)  # Respect Riot API rate limits
+    store = get_timeline_store()
+    match_store = get_match_store()
+
+    # Several tracked summoners can share a game; its timeline is fetched and stored once
+    owners_by_match = {}
+    for row in match_store.rows():
+        owners_by_match.setdefault(row['match_id'], []).append(row['summoner'])
+
+    pending = [match_id for match_id in owners_by_match if match_id not in store]
+    shared = sum(1 for owners in owners_by_match.values() if len(owners) > 1)
+    print(f"🔎 Fetching {len(pending)} timelines "
+          f"({len(owners_by_match) - len(pending)} already stored, {shared} shared between summoners)")
+    client = get_client()
+    saved = 0
+
+    # Downloads run concurrently under the shared rate limiter; get_timeline_data stores each as it lands
+    for match_id, timeline in client.map(
+        lambda m: get_timeline_data(m, use_local=False), pending, region_of=region_for_match_id
+    ):
+        if timeline:
+            saved += 1
+            print(f"✅ Saved: {match_id}")
+
+    match_store.add_timeline_owners(
+        (summoner, match_id)
+        for match_id, owners in owners_by_match.items() if match_id in store
+        for summoner in owners
+    )
+
+    record_rows(rows_in=len(pending), rows_out=saved)
+    store.close()
+    client.report()
 
 if __name__ == '__main__':
     main()
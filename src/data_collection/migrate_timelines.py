@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.timeline_store import TimelineStore, DEFAULT_STORE_DIR
+from utils.match_store import get_match_store
+from utils.riot_helpers import normalize_summoner
+from data_collection.sync_matches_from_timelines import extract_keys_from_filename
+
+
+def human_size(n):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def rekey_legacy_store(store, match_store):
+    """
+    Moves `{summoner}__{match_id}` records from earlier store versions to plain
+    match-ID keys, records their owners, and compacts away the duplicates.
+    """
+    legacy = [key for key in store.keys() if '__' in key]
+    if not legacy:
+        return 0, 0
+
+    owners = []
+    for key in legacy:
+        summoner, match_id = extract_keys_from_filename(key)
+        if match_id not in store:
+            store.put_bytes(match_id, store.get_bytes(key))
+        owners.append((normalize_summoner(summoner), match_id))
+    match_store.add_timeline_owners(owners)
+    reclaimed = store.compact(keep=lambda key: '__' not in key)
+    return len(legacy), reclaimed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="One-shot migration of data/timelines/*.json into the timeline store")
+    parser.add_argument('--source', default=os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'timelines'))
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--delete-originals', action='store_true', help='Remove each JSON file once it is stored')
+    args = parser.parse_args(argv)
+
+    store = TimelineStore(args.store)
+    match_store = get_match_store()
+
+    rekeyed, reclaimed = rekey_legacy_store(store, match_store)
+    if rekeyed:
+        print(f"🔁 Re-keyed {rekeyed} summoner-keyed timelines by match ID, reclaimed {human_size(reclaimed)}")
+
+    files = sorted(f for f in os.listdir(args.source) if f.endswith('_timeline.json')) \
+        if os.path.isdir(args.source) else []
+    if not files:
+        store.close()
+        print(f"✅ Nothing to migrate in {args.source}")
+        return
+
+    original_bytes = 0
+    json_read_seconds = 0.0
+    migrated = []
+    owners = []
+    duplicates = 0
+
+    for fname in files:
+        path = os.path.join(args.source, fname)
+        summoner, match_id = extract_keys_from_filename(fname)
+        if not match_id:
+            continue
+
+        start = time.perf_counter()
+        with open(path, encoding='utf-8') as f:
+            timeline = json.load(f)
+        json_read_seconds += time.perf_counter() - start
+
+        original_bytes += os.path.getsize(path)
+        if match_id in store:
+            duplicates += 1
+        else:
+            store.put(match_id, timeline)
+        migrated.append((match_id, path))
+        owners.append((normalize_summoner(summoner), match_id))
+
+    match_store.add_timeline_owners(owners)
+    store.close()
+
+    # Time the read path the pipeline will use from now on
+    store = TimelineStore(args.store)
+    start = time.perf_counter()
+    for match_id, _ in migrated:
+        store.get(match_id)
+    store_read_seconds = time.perf_counter() - start
+    store_bytes = store.disk_bytes()
+    store.close()
+
+    if args.delete_originals:
+        for _, path in migrated:
+            os.remove(path)
+
+    print(f"✅ Migrated {len(migrated)} timelines → {args.store} ({duplicates} were duplicates of a shared match)")
+    print(f"💾 Disk: {human_size(original_bytes)} → {human_size(store_bytes)} "
+          f"({1 - store_bytes / max(original_bytes, 1):.0%} smaller)")
+    print(f"⏱️ Read all: {json_read_seconds:.2f}s as JSON files → {store_read_seconds:.2f}s from the store "
+          f"({json_read_seconds / max(store_read_seconds, 1e-9):.1f}x)")
+    if not args.delete_originals:
+        print("ℹ️ Originals kept; rerun with --delete-originals once you're happy with the store.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.table_io import read_table
+from utils.pipeline_metrics import record_rows
+from utils.feature_store import get_feature_store
+from feature_engineering.schemas import CLEANED_SCHEMA
+from feature_engineering.lane_curves import load_lane_curve_frame
+from feature_engineering.feature_rows import FEATURE_ROW_VERSION
+
+def main():
+    df = read_table('cleaned_data', CLEANED_SCHEMA)
+
+    # Lane curve columns ride along so the store holds the model's full input
+    try:
+        curves = load_lane_curve_frame().astype({'summoner': 'string', 'match_id': 'string'})
+        df = df.merge(curves, on=['summoner', 'match_id'], how='left')
+    except FileNotFoundError:
+        print("⚠️ No lane curves found; storing rows without curve columns")
+
+    store = get_feature_store()
+    stored = store.upsert_frame(df, FEATURE_ROW_VERSION)
+    record_rows(rows_in=len(df), rows_out=stored)
+    print(f"✅ Stored {stored} feature rows (v{FEATURE_ROW_VERSION}) → {store.db_path} "
+          f"({store.count(FEATURE_ROW_VERSION)} current)")
+
+if __name__ == '__main__':
+    main()
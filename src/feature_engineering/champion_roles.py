@@ -0,0 +1,42 @@
+import os
+import sys
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from feature_engineering.champion_role_map import champion_role_map
+
+ENCODER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'models', 'champion_role_encoder.pkl'))
+
+
+def champion_roles(champions):
+    return pd.Series(champions).map(champion_role_map)
+
+
+def fit_champion_role_encoder(df, path=ENCODER_PATH):
+    """Fits the one-hot role encoder on df's champions and saves it for training and the app."""
+    encoder = OneHotEncoder(sparse_output=False)
+    encoder.fit(champion_roles(df['champion']).dropna().to_frame('champion_role'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump(encoder, path)
+    return encoder
+
+
+def load_champion_role_encoder(path=ENCODER_PATH):
+    return joblib.load(path)
+
+
+def encode_champion_roles(df, encoder):
+    """
+    df with one champion_role_* column per role the encoder knows. Champions
+    without a role (or with a role the encoder never saw) get all zeros, so one
+    function serves both the training table and single live rows.
+    """
+    roles = champion_roles(df['champion']).to_numpy(dtype=object, na_value=None)
+    categories = encoder.categories_[0]
+    encoded = (roles[:, None] == categories[None, :]).astype(float)
+    columns = encoder.get_feature_names_out(['champion_role'])
+    return pd.concat(
+        [df.reset_index(drop=True), pd.DataFrame(encoded, columns=columns)], axis=1
+    )
@@ -0,0 +1,49 @@
+import os
+import sys
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.table_io import read_table, apply_schema
+from utils.feature_store import get_feature_store
+from feature_engineering.timeline_features import FEATURE_ENGINE_VERSION
+from feature_engineering.lane_curves import curve_columns, load_lane_curve_frame
+from feature_engineering.labels import compute_labels, DEFAULT_LABEL
+from feature_engineering.schemas import LABELED_SCHEMA
+
+# Version of a stored feature row. Rows follow the timeline feature definitions,
+# so this moves with FEATURE_ENGINE_VERSION; bump that when row assembly changes too.
+FEATURE_ROW_VERSION = FEATURE_ENGINE_VERSION
+
+# Identifying/text columns that are never model inputs
+ID_COLUMNS = ['summoner', 'match_id', 'champion', 'opp_champion', 'opp_summoner']
+
+
+def model_input_columns(df, label_columns=(), curves=False):
+    """Columns of a feature frame the lane-score model trains on."""
+    excluded = set(ID_COLUMNS) | set(label_columns)
+    if not curves:
+        excluded |= set(curve_columns())
+    return [c for c in df.columns if c not in excluded]
+
+
+def load_training_frame(source='store', curves=False):
+    """
+    Feature rows with every registered label attached, or None if there are none.
+
+    source='store' reads the current rows of the feature store and computes the
+    labels on the fly (one vectorised pass); source='table' reads labeled_data.
+    Either way, only rows with a lane_score are returned, as label_lane_score keeps.
+    """
+    if source == 'store':
+        df = get_feature_store().frame(FEATURE_ROW_VERSION)
+        if df.empty:
+            return None
+        df = apply_schema(df, LABELED_SCHEMA)
+        df = pd.concat([df, compute_labels(df)], axis=1)
+        df['lane_score'] = df[DEFAULT_LABEL]
+        return df[df['lane_score'].notna()]
+
+    df = read_table('labeled_data', LABELED_SCHEMA)
+    if curves:
+        lane_curves = load_lane_curve_frame().astype({'summoner': 'string', 'match_id': 'string'})
+        df = df.merge(lane_curves, on=['summoner', 'match_id'], how='left')
+    return df
@@ -1,10 +1,18 @@
 import os
+import sys
+import argparse
 import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.table_io import read_table, write_table
+from utils.pipeline_metrics import record_rows
+from feature_engineering.schemas import CLEANED_SCHEMA, LABELED_SCHEMA
+from feature_engineering.labels import LABEL_DEFINITIONS, DEFAULT_LABEL, compute_labels
 
 def calculate_lane_score(trend_5_to_10, trend_10_to_15):
     """
     Score is based on gold advantage growth or decline in early lane phase.
     0 = disastrous trend (heavy gold loss), 100 = dominant trend (heavy gold gain).
+    Single-row form of the lane_score_gold_trend_v1 label.
     """
     if pd.isna(trend_5_to_10) or pd.isna(trend_10_to_15):
         return None
@@ -15,28 +23,37 @@ def calculate_lane_score(trend_5_to_10, trend_10_to_15):
 
     return scaled
 
-def main():
-    base_dir = os.path.dirname(__file__)
-    input_path = os.path.join(base_dir, '..','..', 'data', 'cleaned_data.csv')
-    output_path = os.path.join(base_dir, '..','..', 'data', 'labeled_data.csv')
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute every registered lane label in one pass")
+    parser.add_argument('--list', action='store_true', help='Show the registered labels and exit')
+    args = parser.parse_args(argv)
 
-    df = pd.read_csv(input_path)
+    if args.list:
+        for column, label in LABEL_DEFINITIONS.items():
+            print(f"{column:<36} {label.description}")
+        return
+
+    df = read_table('cleaned_data', CLEANED_SCHEMA)
 
-    if not {'gold_diff_trend_5_to_10', 'gold_diff_trend_10_to_15'}.issubset(df.columns):
-        print("❌ Required trend columns not found in cleaned_data.csv")
+    try:
+        labels = compute_labels(df)
+    except ValueError as e:
+        print(f"❌ {e}")
         return
 
-    df['lane_score'] = df.apply(
-        lambda row: calculate_lane_score(
-            row['gold_diff_trend_5_to_10'],
-            row['gold_diff_trend_10_to_15']
-        ),
-        axis=1
-    )
+    df = pd.concat([df.drop(columns=[c for c in labels.columns if c in df.columns]), labels], axis=1)
+    df['lane_score'] = df[DEFAULT_LABEL]
 
+    # A row is labelled when lane_score is, as before the registry; the other labels
+    # ride along and training drops rows missing its own label
+    rows_in = len(df)
     df = df[df['lane_score'].notna()]
-    df.to_csv(output_path, index=False)
-    print(f"✅ Labeled data with lane_score saved to {output_path}")
+    output_path = write_table(df, 'labeled_data', LABELED_SCHEMA)
+    record_rows(rows_in=rows_in, rows_out=len(df))
+
+    for column in labels.columns:
+        print(f"🏷️ {column}: {int(df[column].notna().sum())} rows")
+    print(f"✅ Labeled data with {len(labels.columns)} labels (lane_score = {DEFAULT_LABEL}) saved to {output_path}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+
+def scaled_clip(values, bound):
+    """Clips values to ±bound and maps them onto 0–100 (0 = -bound, 100 = +bound)."""
+    clipped = np.clip(values, -bound, bound)
+    return ((clipped + bound) / (2 * bound) * 100).round(2)
+
+
+class LabelDefinition:
+    """
+    One versioned label. compute(df) receives the columns named in inputs as
+    float64 (missing values as NaN) and returns a float64 array; rows with any
+    missing input get NaN. Change a definition by registering a new version, so
+    models trained on the old column stay reproducible.
+    """
+    __slots__ = ('name', 'version', 'inputs', 'compute', 'description')
+
+    def __init__(self, name, version, inputs, compute, description):
+        self.name = name
+        self.version = version
+        self.inputs = inputs
+        self.compute = compute
+        self.description = description
+
+    @property
+    def column(self):
+        return f"lane_score_{self.name}_v{self.version}"
+
+
+def _gold_trend(bound):
+    return lambda cols: scaled_clip(cols['gold_diff_trend_5_to_10'] + cols['gold_diff_trend_10_to_15'], bound)
+
+
+LABEL_DEFINITIONS = {
+    label.column: label for label in [
+        LabelDefinition(
+            'gold_trend', 1, ['gold_diff_trend_5_to_10', 'gold_diff_trend_10_to_15'], _gold_trend(1500),
+            "Gold advantage growth from 5 to 15 min, clipped to ±1500 (the original lane_score)"
+        ),
+        LabelDefinition(
+            'gold_trend_tight', 1, ['gold_diff_trend_5_to_10', 'gold_diff_trend_10_to_15'], _gold_trend(750),
+            "Gold advantage growth from 5 to 15 min, clipped to ±750"
+        ),
+        LabelDefinition(
+            'gold_trend_wide', 1, ['gold_diff_trend_5_to_10', 'gold_diff_trend_10_to_15'], _gold_trend(3000),
+            "Gold advantage growth from 5 to 15 min, clipped to ±3000"
+        ),
+        LabelDefinition(
+            'gold_at_15', 1, ['gold_diff_at_15'], lambda cols: scaled_clip(cols['gold_diff_at_15'], 2000),
+            "Gold lead over the lane opponent at 15 min, clipped to ±2000"
+        ),
+        LabelDefinition(
+            'cs_diff', 1, ['cs_diff_at_10'], lambda cols: scaled_clip(cols['cs_diff_at_10'], 30),
+            "CS lead over the lane opponent at 10 min, clipped to ±30"
+        ),
+        LabelDefinition(
+            'gold_cs_blend', 1, ['gold_diff_trend_5_to_10', 'gold_diff_trend_10_to_15', 'cs_diff_at_10'],
+            lambda cols: ((_gold_trend(1500)(cols) + scaled_clip(cols['cs_diff_at_10'], 30)) / 2).round(2),
+            "Mean of the gold_trend and cs_diff scores"
+        ),
+    ]
+}
+
+# `lane_score` stays an alias of this label for existing consumers
+DEFAULT_LABEL = 'lane_score_gold_trend_v1'
+LABEL_COLUMNS = list(LABEL_DEFINITIONS)
+
+
+def compute_labels(df, labels=None):
+    """
+    Every registered label (or just `labels`) for df as a DataFrame of float64
+    columns, one vectorised expression per label. Each input column is converted
+    to float once and shared between the labels that use it.
+    """
+    definitions = [LABEL_DEFINITIONS[name] for name in (labels or LABEL_COLUMNS)]
+    needed = {column for label in definitions for column in label.inputs}
+    missing = needed - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing label input columns: {sorted(missing)}")
+    cols = {column: df[column].astype('float64').to_numpy() for column in needed}
+
+    out = {}
+    for label in definitions:
+        values = np.asarray(label.compute(cols), dtype='float64')
+        incomplete = np.zeros(len(df), dtype=bool)
+        for column in label.inputs:
+            incomplete |= np.isnan(cols[column])
+        values[incomplete] = np.nan
+        out[label.column] = values
+    return pd.DataFrame(out, index=df.index)
@@ -0,0 +1,46 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.table_io import write_arrays, read_arrays, DATA_DIR
+from feature_engineering.timeline_features import CURVE_STATS, CURVE_MINUTES
+
+CURVES_NAME = 'lane_curves'
+
+
+def curve_columns():
+    """Flat column names for the curves, e.g. gold_diff_m01 … level_diff_m15."""
+    return [f"{stat}_diff_m{minute:02d}" for stat in CURVE_STATS for minute in range(1, CURVE_MINUTES + 1)]
+
+
+def flatten_curves(curves):
+    """One (stat × minute) curve array as a {column: value} dict with NaN as None."""
+    return {
+        column: None if np.isnan(value) else float(value)
+        for column, value in zip(curve_columns(), curves.ravel())
+    }
+
+
+def write_lane_curves(summoners, match_ids, curves, data_dir=DATA_DIR):
+    """
+    Saves curves for many rows as one (row × stat × minute) float32 block next to
+    their (summoner, match_id) keys; ~240 bytes per row before compression.
+    """
+    block = np.stack(curves) if len(curves) else np.empty((0, len(CURVE_STATS), CURVE_MINUTES), np.float32)
+    return write_arrays(
+        CURVES_NAME, data_dir,
+        summoner=np.asarray(summoners, dtype=str),
+        match_id=np.asarray(match_ids, dtype=str),
+        curves=block.astype(np.float32),
+    )
+
+
+def load_lane_curve_frame(data_dir=DATA_DIR):
+    """The stored curves as a DataFrame keyed by summoner/match_id with one column per (stat, minute)."""
+    arrays = read_arrays(CURVES_NAME, data_dir)
+    curves = arrays['curves']
+    df = pd.DataFrame(curves.reshape(len(curves), -1), columns=curve_columns())
+    df.insert(0, 'match_id', arrays['match_id'])
+    df.insert(0, 'summoner', arrays['summoner'])
+    return df
@@ -7,6 +7,9 @@ FEATURES_TO_TRAIN = [
     'gold_diff_trend_5_to_10',
     'gold_diff_trend_10_to_15',
     'avg_cs_per_min',
+    'mid_lane_presence_to_14',
+    'roam_count_to_14',
+    'avg_opp_distance_to_14',
 ]
 
 LOG_TRANSFORM_FEATURES = []
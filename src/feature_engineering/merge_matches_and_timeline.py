@@ -1,57 +1,170 @@
 import os
-import csv
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.match_store import get_match_store
+from utils.riot_helpers import normalize_summoner
+from utils.table_io import read_table, iter_table, write_table, TableWriter, DATA_DIR
+from utils.pipeline_metrics import record_rows
+from feature_engineering.schemas import MATCH_SCHEMA, TIMELINE_SCHEMA, MERGED_SCHEMA
 
-def read_csv(path):
-    with open(path, newline='', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+JOIN_KEYS = ['summoner', 'match_id']
+REPORT_PATH = os.path.join(DATA_DIR, 'merge_join_report.json')
 
-def write_csv(path, fieldnames, rows):
-    with open(path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+# Values that count as "not there" when coalescing, as in the old CSV rows
+MISSING_TEXT = ['', 'None']
 
-def main():
-    base_dir = os.path.dirname(__file__)
-    match_path = os.path.join(base_dir, '..', '..', 'data', 'midlane_matches.csv')
-    timeline_path = os.path.join(base_dir, '..', '..', 'data', 'parsed_timeline_features.csv')
-    output_path = os.path.join(base_dir, '..', '..', 'data', 'merged_data.csv')
 
-    matches = read_csv(match_path)
-    timelines = read_csv(timeline_path)
+def _present(series):
+    present = series.notna()
+    if not pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        present &= ~series.isin(MISSING_TEXT)
+    return present
+
+
+def merge_frames(matches, timelines):
+    """
+    Joins match rows to parsed timeline rows on (summoner, match_id).
+
+    A column present on both sides takes the timeline value unless it's missing,
+    then falls back to the match value. Rows without a usable opponent are dropped.
+    Returns (merged, unmatched_matches, unmatched_timelines); the last two are the
+    key columns of rows that found no partner.
+    """
+    matches = matches.assign(summoner=matches['summoner'].map(normalize_summoner))
+    timelines = timelines.drop_duplicates(JOIN_KEYS, keep='last')
+
+    joined = matches.merge(
+        timelines, on=JOIN_KEYS, how='left', suffixes=('_match', '_timeline'), indicator=True
+    )
+    overlap = [c for c in matches.columns if c in timelines.columns and c not in JOIN_KEYS]
+    for column in overlap:
+        from_timeline = joined[f'{column}_timeline']
+        joined[column] = from_timeline.where(_present(from_timeline), joined[f'{column}_match'])
+    joined = joined.drop(columns=[f'{c}_{side}' for c in overlap for side in ('match', 'timeline')])
+
+    matched = joined['_merge'] == 'both'
+    unmatched_matches = joined.loc[~matched, JOIN_KEYS]
+
+    timeline_keys = pd.MultiIndex.from_frame(timelines[JOIN_KEYS])
+    match_keys = pd.MultiIndex.from_frame(matches[JOIN_KEYS])
+    unmatched_timelines = timelines.loc[~timeline_keys.isin(match_keys), JOIN_KEYS]
+
+    merged = joined.loc[matched].drop(columns='_merge')
+    # 🧹 Remove rows where opponent's participant ID is missing or invalid
+    opp = pd.to_numeric(merged['opp_participant_id'], errors='coerce')
+    merged = merged[opp.notna() & (opp != -1)]
+    return merged.reset_index(drop=True), unmatched_matches, unmatched_timelines
+
+
+def _partition(df, partitions):
+    keys = df[JOIN_KEYS].astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy() % partitions
 
-    timeline_index = {
-        row['match_id']: row for row in timelines
-    }
 
-    merged_rows = []
+def _spill(chunks, side, workdir, partitions):
+    """
+    Hash-partitions chunks by join key into pickled pieces under workdir/side/p{n}/.
+    Returns the number of rows spilled.
+    """
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        rows += len(chunk)
+        for part, piece in chunk.groupby(_partition(chunk, partitions)):
+            part_dir = os.path.join(workdir, side, f'p{part}')
+            os.makedirs(part_dir, exist_ok=True)
+            piece.to_pickle(os.path.join(part_dir, f'{i}.pkl'))
+    return rows
 
-    for match in matches:
-        match_id = match['match_id']
-        timeline = timeline_index.get(match_id)
 
-        if not timeline:
-            print(f"⚠️ Timeline data not found for match {match_id}")
-            continue
+def _load_partition(workdir, side, part, schema):
+    part_dir = os.path.join(workdir, side, f'p{part}')
+    if not os.path.isdir(part_dir):
+        return pd.DataFrame(columns=list(schema)).astype(schema)
+    pieces = [pd.read_pickle(os.path.join(part_dir, name)) for name in sorted(os.listdir(part_dir))]
+    return pd.concat(pieces, ignore_index=True)
 
-        combined = {
-    key: timeline.get(key) if timeline.get(key) not in [None, '', 'None'] else match.get(key)
-    for key in set(match) | set(timeline)
-}
 
-        merged_rows.append(combined)
+def merge_chunked(partitions=16, batch_rows=100_000):
+    """
+    Out-of-core merge: both sides are streamed in batches and hash-partitioned on
+    (summoner, match_id) into a scratch directory, then each partition is joined
+    on its own and appended to the output. Peak memory is about one partition of
+    each side. Output rows are grouped by partition rather than in match order.
+    """
+    match_store = get_match_store()
+    workdir = tempfile.mkdtemp(prefix='merge_', dir=DATA_DIR)
+    unmatched_matches, unmatched_timelines = [], []
+    try:
+        normalized = (
+            pd.DataFrame(rows, columns=list(MATCH_SCHEMA)).astype(MATCH_SCHEMA)
+              .assign(summoner=lambda df: df['summoner'].map(normalize_summoner))
+            for rows in match_store.iter_rows(batch_rows)
+        )
+        record_rows(rows_in=_spill(normalized, 'matches', workdir, partitions))
+        _spill(iter_table('parsed_timeline_features', TIMELINE_SCHEMA, batch_rows), 'timelines', workdir, partitions)
+
+        with TableWriter('merged_data', MERGED_SCHEMA) as writer:
+            for part in range(partitions):
+                matches = _load_partition(workdir, 'matches', part, MATCH_SCHEMA)
+                timelines = _load_partition(workdir, 'timelines', part, TIMELINE_SCHEMA)
+                merged, missing_matches, missing_timelines = merge_frames(matches, timelines)
+                if len(merged):
+                    writer.write(merged)
+                unmatched_matches.append(missing_matches)
+                unmatched_timelines.append(missing_timelines)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return writer.path, writer.rows, pd.concat(unmatched_matches), pd.concat(unmatched_timelines)
+
+
+def write_join_report(unmatched_matches, unmatched_timelines, merged_rows, path=REPORT_PATH):
+    report = {
+        'merged_rows': int(merged_rows),
+        'unmatched_matches': unmatched_matches[JOIN_KEYS].astype(str).values.tolist(),
+        'unmatched_timelines': unmatched_timelines[JOIN_KEYS].astype(str).values.tolist(),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"🧾 Join report → {path}: {len(report['unmatched_matches'])} matches without a parsed timeline, "
+          f"{len(report['unmatched_timelines'])} parsed timelines without a match row")
+    for summoner, match_id in report['unmatched_matches'][:5]:
+        print(f"⚠️ Timeline data not found for match {match_id} ({summoner})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Join match rows with parsed timeline features")
+    parser.add_argument('--chunked', action='store_true',
+                        help='Partition both sides on disk and merge one partition at a time (for data larger than RAM)')
+    parser.add_argument('--partitions', type=int, default=16)
+    parser.add_argument('--batch-rows', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    if args.chunked:
+        output_path, merged_rows, unmatched_matches, unmatched_timelines = merge_chunked(
+            args.partitions, args.batch_rows
+        )
+    else:
+        matches = pd.DataFrame(get_match_store().rows(), columns=list(MATCH_SCHEMA)).astype(MATCH_SCHEMA)
+        timelines = read_table('parsed_timeline_features', TIMELINE_SCHEMA)
+        merged, unmatched_matches, unmatched_timelines = merge_frames(matches, timelines)
+        merged_rows = len(merged)
+        record_rows(rows_in=len(matches))
+        output_path = write_table(merged, 'merged_data', MERGED_SCHEMA) if merged_rows else None
 
+    write_join_report(unmatched_matches, unmatched_timelines, merged_rows)
+    record_rows(rows_out=merged_rows, unmatched_matches=len(unmatched_matches),
+                unmatched_timelines=len(unmatched_timelines))
     if merged_rows:
-        # 🧹 Remove rows where opponent's participant ID is missing or invalid
-        merged_rows = [
-        row for row in merged_rows
-        if row.get('opp_participant_id') not in [None, '', '-1']]
-
-        fieldnames = merged_rows[0].keys()
-        write_csv(output_path, fieldnames, merged_rows)
-        print(f"✅ Merged {len(merged_rows)} rows → {output_path}")
+        print(f"✅ Merged {merged_rows} rows → {output_path}")
     else:
-        print("❌ No data merged. Check CSV consistency.")
+        print("❌ No data merged. Check table consistency.")
 
 
 if __name__ == '__main__':
@@ -1,203 +1,193 @@
 import os
-import json
-import csv
 import sys
+import json
+import argparse
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from utils.riot_helpers import normalize_summoner
-from utils.feature_extract_helper import is_boots, calculate_kda
-
-
-def extract_features(timeline_json, match_id, summoner, participant_id, opp_participant_id=None):
-    info = timeline_json['info']
-    frames = info['frames']
-    events = [e for frame in frames for e in frame['events']]
-
-    features = {
-        'summoner': normalize_summoner(summoner),
-        'match_id': match_id,
-        'champion': None,
-        'cs_at_10min': None,
-        'opp_cs_at_10min': None,
-        'first_ward_time': None,
-        'first_death_time': None,
-        'first_kill_or_assist_time': None,
-        'first_item_after_4min_id': None,
-        'first_item_after_4min_time': None,
-        'boots_purchase_time': None,
-        'first_teamfight_join_time': None,
-        'fight_impact_score': 0,
-        'avg_cs_per_min': None,
-        'game_length_minutes': None,
-        'kda': None,
-        'opp_kda': None,
-        'cs_diff_at_10': None,
-        'gold_diff_at_5': None,
-        'gold_diff_at_10': None,
-        'gold_diff_at_15': None,
-        'gold_diff_trend_5_to_10': None,
-        'gold_diff_trend_10_to_15': None,
-        'early_roam': False,
-        'has_early_lane_prio': False
-    }
-
-    if not frames:
-        return None
-
-    game_duration = frames[-1]['timestamp'] / 1000
-    features['game_length_minutes'] = round(game_duration / 60, 2)
-
-    final_cs = 0
-    kills = deaths = assists = 0
-    opp_kills = opp_deaths = opp_assists = 0
-
-    for frame in frames:
-        pf = frame.get('participantFrames', {}).get(str(participant_id))
-        opp_pf = frame.get('participantFrames', {}).get(str(opp_participant_id)) if opp_participant_id else None
-
-        if pf:
-            cs = pf.get('minionsKilled', 0) + pf.get('jungleMinionsKilled', 0)
-            if frame['timestamp'] >= 600000 and not features['cs_at_10min']:
-                features['cs_at_10min'] = cs
-            if frame == frames[-1]:
-                final_cs = cs
-
-        if opp_pf:
-            if frame['timestamp'] >= 600000 and not features['opp_cs_at_10min']:
-                features['opp_cs_at_10min'] = opp_pf.get('minionsKilled', 0) + opp_pf.get('jungleMinionsKilled', 0)
-
-    if game_duration > 0:
-        features['avg_cs_per_min'] = round(final_cs / (game_duration / 60), 2)
-
-    for event in events:
-        t = event['timestamp'] / 1000
-
-        if event['type'] == 'WARD_PLACED' and event.get('creatorId') == participant_id and not features['first_ward_time']:
-            features['first_ward_time'] = t
-
-        if event['type'] == 'CHAMPION_KILL':
-            if event.get('victimId') == participant_id:
-                if not features['first_death_time']:
-                    features['first_death_time'] = t
-                deaths += 1
-            if event.get('killerId') == participant_id:
-                if not features['first_kill_or_assist_time']:
-                    features['first_kill_or_assist_time'] = t
-                if not features['first_teamfight_join_time'] and len(event.get('assistingParticipantIds', [])) >= 2:
-                    features['first_teamfight_join_time'] = t
-                if t <= 900:
-                    features['fight_impact_score'] += 1
-                kills += 1
-            elif participant_id in event.get('assistingParticipantIds', []):
-                if not features['first_kill_or_assist_time']:
-                    features['first_kill_or_assist_time'] = t
-                if not features['first_teamfight_join_time'] and len(event.get('assistingParticipantIds', [])) >= 2:
-                    features['first_teamfight_join_time'] = t
-                if t <= 900:
-                    features['fight_impact_score'] += 1
-                assists += 1
-
-            # Opponent stats
-            if event.get('victimId') == opp_participant_id:
-                opp_deaths += 1
-            if event.get('killerId') == opp_participant_id:
-                opp_kills += 1
-            elif opp_participant_id in event.get('assistingParticipantIds', []):
-                opp_assists += 1
-
-        if event['type'] == 'ITEM_PURCHASED' and event.get('participantId') == participant_id:
-            item_id = event.get('itemId')
-            if t > 240 and not features['first_item_after_4min_id']:
-                features['first_item_after_4min_id'] = item_id
-                features['first_item_after_4min_time'] = t
-            if is_boots(item_id) and not features['boots_purchase_time']:
-                features['boots_purchase_time'] = t
-
-    # Final derived metrics
-    features['kda'] = calculate_kda(kills, assists, deaths)
-    features['opp_kda'] = calculate_kda(opp_kills, opp_assists, opp_deaths)
-
-    if features['cs_at_10min'] is not None and features['opp_cs_at_10min'] is not None:
-        features['cs_diff_at_10'] = features['cs_at_10min'] - features['opp_cs_at_10min']
-
-    # Gold diff at 10 min
-    for frame in frames:
-        ts = frame['timestamp']
-        pf = frame.get('participantFrames', {}).get(str(participant_id))
-        opp_pf = frame.get('participantFrames', {}).get(str(opp_participant_id))
-
-        if pf and opp_pf:
-            p_gold = pf.get('totalGold', 0)
-            opp_gold = opp_pf.get('totalGold', 0)
-            diff = p_gold - opp_gold
-
-            if ts >= 300000 and features.get('gold_diff_at_5') is None:
-                features['gold_diff_at_5'] = diff
-            if ts >= 600000 and features.get('gold_diff_at_10') is None:
-                features['gold_diff_at_10'] = diff
-            if ts >= 900000 and features.get('gold_diff_at_15') is None:
-                features['gold_diff_at_15'] = diff
-
-    if features['gold_diff_at_5'] is not None and features['gold_diff_at_10'] is not None:
-        features['gold_diff_trend_5_to_10'] = features['gold_diff_at_10'] - features['gold_diff_at_5']
-
-    if features['gold_diff_at_10'] is not None and features['gold_diff_at_15'] is not None:
-        features['gold_diff_trend_10_to_15'] = features['gold_diff_at_15'] - features['gold_diff_at_10']
-
-
-    # Early roam
-    if features['first_teamfight_join_time'] and features['first_teamfight_join_time'] <= 600:
-        features['early_roam'] = True
-
-    # Has early lane prio: any two of cs_diff > 10, gold_diff > 300, early roam
-    prio_flags = [
-        features['cs_diff_at_10'] is not None and features['cs_diff_at_10'] >= 10,
-        features['gold_diff_at_10'] is not None and features['gold_diff_at_10'] >= 300,
-        features['early_roam']
-    ]
-
-    features['has_early_lane_prio'] = prio_flags.count(True) >= 2
-
-    return features
-
-
-
-def main():
-    input_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'timelines')
-    match_info_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'midlane_matches.csv')
-    output_file = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'parsed_timeline_features.csv')
-
-    with open(match_info_path, newline='', encoding='utf-8') as f:
-        match_info_list = list(csv.DictReader(f))
-
-    results = []
-
+from utils.timeline_store import TimelineStore, get_timeline_store, DEFAULT_STORE_DIR
+from utils.timeline_stream import iter_frames
+from utils.match_store import get_match_store
+from utils.feature_cache import FeatureCache, DEFAULT_CACHE_PATH
+from utils.table_io import write_table, EXTENSIONS, DEFAULT_FORMAT
+from utils.pipeline_metrics import record_rows
+from feature_engineering.timeline_features import (
+    compute_lane_features, FEATURE_ENGINE_VERSION, CURVE_STATS, CURVE_MINUTES
+)
+from feature_engineering.schemas import TIMELINE_SCHEMA
+from feature_engineering.lane_curves import write_lane_curves
+
+
+def extract_features(timeline_json, match_id, summoner, participant_id, opp_participant_id=None,
+                     return_curves=False):
+    frames = timeline_json['info']['frames']
+    return extract_features_streaming(frames, match_id, summoner, participant_id, opp_participant_id, return_curves)
+
+
+def extract_features_streaming(frames, match_id, summoner, participant_id, opp_participant_id=None,
+                               return_curves=False):
+    """
+    frames may be a loaded list or an iterator such as iter_frames over a stored
+    timeline. The JSON document is never held whole, but the engine keeps the
+    player's and opponent's participant frames from every frame for the lane
+    curves and positional features, so memory still grows with game length.
+    With return_curves, returns (features, lane curves).
+    """
+    lane_features, curves = compute_lane_features(frames, participant_id, opp_participant_id, return_curves=True)
+    if lane_features is None:
+        features = None
+    else:
+        features = {'summoner': normalize_summoner(summoner), 'match_id': match_id, **lane_features}
+    return (features, curves) if return_curves else features
+
+
+# Each worker process opens its own read handle on the store
+_worker_store = None
+_worker_streaming = False
+
+
+def _init_worker(store_dir, streaming):
+    global _worker_store, _worker_streaming
+    _worker_store = TimelineStore(store_dir)
+    _worker_streaming = streaming
+
+
+def parse_job(job, store=None, streaming=None):
+    """
+    Parses one (summoner, match_id, participant_id, opp_participant_id) job.
+    Returns (features, curves, error) so one bad timeline never aborts the batch.
+    """
+    store = store or _worker_store
+    streaming = _worker_streaming if streaming is None else streaming
+    summoner, match_id, participant_id, opp_participant_id = job
+
+    if match_id not in store:
+        return None, None, "missing timeline"
+    try:
+        if streaming:
+            frames = iter_frames(store.iter_chunks(match_id))
+            features, curves = extract_features_streaming(
+                frames, match_id, summoner, participant_id, opp_participant_id, return_curves=True
+            )
+        else:
+            timeline = store.get(match_id)
+            features, curves = extract_features(
+                timeline, match_id, summoner, participant_id, opp_participant_id, return_curves=True
+            )
+    except Exception as e:
+        return None, None, f"{type(e).__name__}: {e}"
+    return features, curves, None
+
+
+def parse_raw(job, raw):
+    """parse_job for a timeline already in hand as raw JSON bytes (e.g. straight off the API)."""
+    summoner, match_id, participant_id, opp_participant_id = job
+    try:
+        return (*extract_features(
+            json.loads(raw), match_id, summoner, participant_id, opp_participant_id, return_curves=True
+        ), None)
+    except Exception as e:
+        return None, None, f"{type(e).__name__}: {e}"
+
+
+def build_jobs(match_info_list):
+    jobs = []
     for match_info in match_info_list:
-        summoner = match_info['summoner']
-        match_id = match_info['match_id']
-        participant_id = int(match_info.get('participant_id', -1))
-        opp_participant_id = int(match_info.get('opp_participant_id', -1)) if match_info.get('opp_participant_id') else None
-
-        filename = f"{summoner.replace(' ', '_').replace('#', '-') }__{match_id}_timeline.json"
-        filepath = os.path.join(input_dir, filename)
-        if not os.path.exists(filepath):
-            print(f"❌ Missing timeline file for match: {filename}")
-            continue
-
-        with open(filepath, newline='', encoding='utf-8') as f:
-            timeline = json.load(f)
-
-        features = extract_features(timeline, match_id, summoner, participant_id, opp_participant_id)
-        if features:
-            results.append(features)
-
-    fieldnames = results[0].keys() if results else []
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
-
-    print(f"\n✅ Parsed {len(results)} timelines → saved to {output_file}")
+        participant_id = int(match_info.get('participant_id') or -1)
+        opp_participant_id = int(match_info['opp_participant_id']) if match_info.get('opp_participant_id') else None
+        jobs.append((match_info['summoner'], match_info['match_id'], participant_id, opp_participant_id))
+    return jobs
+
+
+def parse_all(jobs, workers=1, chunksize=16, streaming=False, store_dir=DEFAULT_STORE_DIR):
+    """
+    Yields (job, features, curves, error) in job order. With workers > 1 the jobs are
+    handed to a process pool in chunks; results still come back in input order.
+    """
+    if workers <= 1:
+        store = get_timeline_store() if store_dir == DEFAULT_STORE_DIR else TimelineStore(store_dir)
+        for job in jobs:
+            yield (job, *parse_job(job, store, streaming))
+        return
+
+    # Spawned workers: run_data_pipeline runs this after the fetch stages started
+    # RiotClient threads, and forking a process with live threads and locks can deadlock
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(store_dir, streaming)) as pool:
+        for job, result in zip(jobs, pool.map(parse_job, jobs, chunksize=chunksize)):
+            yield (job, *result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract lane features from stored timelines")
+    parser.add_argument('--streaming', action='store_true',
+                        help='Decode timelines frame by frame instead of loading each whole document')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Parser processes (1 parses in this process)')
+    parser.add_argument('--chunksize', type=int, default=16, help='Timelines handed to a worker at a time')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help='Feature cache database')
+    parser.add_argument('--rebuild', action='store_true', help='Ignore cached features and re-parse everything')
+    parser.add_argument('--format', choices=list(EXTENSIONS), default=DEFAULT_FORMAT, help='Output table format')
+    args = parser.parse_args(argv)
+
+    jobs = build_jobs(get_match_store().rows())
+    store = TimelineStore(args.store) if args.store != DEFAULT_STORE_DIR else get_timeline_store()
+    cache = FeatureCache(args.cache)
+    cache.prune(FEATURE_ENGINE_VERSION)
+    cached = {} if args.rebuild else cache.lookup(FEATURE_ENGINE_VERSION)
+
+    # Reuse rows whose timeline content and engine version are unchanged; parse the rest
+    results = [None] * len(jobs)
+    curves = [None] * len(jobs)
+    hashes = {}
+    pending = []
+    for i, (summoner, match_id, participant_id, opp_participant_id) in enumerate(jobs):
+        timeline_hash = hashes[match_id] = store.content_hash(match_id)
+        hit = cache.get(cached, match_id, participant_id, opp_participant_id, timeline_hash,
+                        curve_shape=(len(CURVE_STATS), CURVE_MINUTES)) if timeline_hash else None
+        if hit is not None:
+            lane_features, curves[i] = hit
+            results[i] = {'summoner': normalize_summoner(summoner), 'match_id': match_id, **lane_features}
+        else:
+            pending.append(i)
+    print(f"🗂️ {len(jobs) - len(pending)} cached, {len(pending)} to parse (engine v{FEATURE_ENGINE_VERSION})")
+
+    failures = []
+    fresh = []
+    pending_jobs = [jobs[i] for i in pending]
+    for i, ((summoner, match_id, participant_id, opp_participant_id), features, lane_curves, error) in zip(pending, parse_all(
+        pending_jobs, workers=args.workers, chunksize=args.chunksize, streaming=args.streaming, store_dir=args.store
+    )):
+        if error:
+            failures.append((match_id, error))
+            print(f"❌ {match_id} ({summoner}): {error}")
+        elif features:
+            results[i] = features
+            curves[i] = lane_curves
+            lane_features = {k: v for k, v in features.items() if k not in ('summoner', 'match_id')}
+            fresh.append((match_id, participant_id, opp_participant_id, hashes[match_id], lane_features, lane_curves))
+    cache.put_many(fresh, FEATURE_ENGINE_VERSION)
+    cache.close()
+
+    kept = [i for i, row in enumerate(results) if row]
+    results = [results[i] for i in kept]
+    df = pd.DataFrame(results) if results else pd.DataFrame(columns=list(TIMELINE_SCHEMA))
+    output_file = write_table(df, 'parsed_timeline_features', TIMELINE_SCHEMA, args.format)
+    # Curves sit next to the table in row order, as one fixed-width float32 block
+    curves_file = write_lane_curves(
+        [row['summoner'] for row in results], [row['match_id'] for row in results], [curves[i] for i in kept]
+    )
+
+    record_rows(rows_in=len(jobs), rows_out=len(results), feature_cache_hits=len(jobs) - len(pending),
+                feature_cache_misses=len(pending), parse_failures=len(failures))
+    print(f"\n✅ Wrote {len(results)} timelines ({len(fresh)} parsed with {max(args.workers, 1)} worker(s)) → saved to {output_file}")
+    print(f"📈 Lane curves ({len(results)} × {'/'.join(CURVE_STATS)} × {CURVE_MINUTES} min) → {curves_file}")
+    if failures:
+        print(f"⚠️ {len(failures)} timelines failed and were skipped")
 
 if __name__ == '__main__':
     main()
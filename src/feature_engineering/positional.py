@@ -0,0 +1,85 @@
+import numpy as np
+
+# Summoner's Rift coordinates: blue fountain near (0, 0), red near (14870, 14870);
+# mid lane runs along the x == y diagonal between the two bases.
+MAP_SIZE = 14870
+SQRT_2 = np.sqrt(2)
+MID_LANE_HALF_WIDTH = 1200      # perpendicular distance from the diagonal still counted as mid
+BASE_EXTENT = 3000              # along-diagonal distance from a corner that counts as base
+NEAR_OPPONENT = 2000            # "in lane with the opponent" distance
+# Frames are one minute apart and land a little after each minute; keep through the 14:00 frame
+LANING_PHASE_END_MS = 14 * 60000 + 30000
+# Laning frames come after the 0:00 frame, through LANING_PHASE_END_MS
+LANING_PHASE_BOUNDS_MS = np.array([0, LANING_PHASE_END_MS])
+
+POSITIONAL_FEATURE_DEFAULTS = {
+    'mid_lane_presence_to_14': None,
+    'roam_count_to_14': None,
+    'first_roam_time': None,
+    'avg_opp_distance_to_14': None,
+    'opp_proximity_share_to_14': None,
+}
+
+POSITIONAL_FEATURE_TYPES = {
+    'mid_lane_presence_to_14': 'float64',
+    'roam_count_to_14': 'Int64',
+    'first_roam_time': 'float64',
+    'avg_opp_distance_to_14': 'float64',
+    'opp_proximity_share_to_14': 'float64',
+}
+
+
+def classify_zones(positions):
+    """
+    Zone masks for every position at once, from an array of (x, y) pairs such
+    as (frame × 2) or (frame × participant × 2): (in_mid, in_base, away).
+    NaN positions are in no zone.
+    """
+    x = positions[..., 0]
+    y = positions[..., 1]
+    along = (x + y) / 2
+    off_diagonal = np.abs(x - y) / SQRT_2
+    known = ~np.isnan(x)
+
+    in_base = known & ((along <= BASE_EXTENT) | (along >= MAP_SIZE - BASE_EXTENT))
+    outside_base = known & ~in_base
+    in_mid = outside_base & (off_diagonal <= MID_LANE_HALF_WIDTH)
+    away = outside_base & ~in_mid
+    return in_mid, in_base, away
+
+
+def compute_positional_features(features, timestamps, positions):
+    """
+    Lane presence, roams and opponent proximity during the laning phase.
+
+    positions is (frame × participant × 2) with the player at index 0 and their
+    lane opponent (if any) at index 1; timestamps ascend, as in a timeline.
+    A roam is a run of consecutive frames spent away from both mid lane and
+    base; first_roam_time is the timestamp (s) of its first frame.
+    """
+    start, end = np.searchsorted(timestamps, LANING_PHASE_BOUNDS_MS, side='right')
+    if start == end:
+        return
+
+    player = positions[start:end, 0]
+    known = ~np.isnan(player[:, 0])
+    if not known.any():
+        return
+
+    player_mid, _, player_away = classify_zones(player[known])
+    features['mid_lane_presence_to_14'] = round(float(np.count_nonzero(player_mid) / player_mid.size), 3)
+
+    roam_starts = player_away & ~np.concatenate(([False], player_away[:-1]))
+    roam_count = int(np.count_nonzero(roam_starts))
+    features['roam_count_to_14'] = roam_count
+    if roam_count:
+        features['first_roam_time'] = int(timestamps[start:end][known][np.argmax(roam_starts)]) / 1000
+
+    if positions.shape[1] < 2:
+        return
+    delta = player - positions[start:end, 1]
+    distance = np.hypot(delta[:, 0], delta[:, 1])
+    distance = distance[~np.isnan(distance)]
+    if distance.size:
+        features['avg_opp_distance_to_14'] = round(float(distance.sum()) / distance.size, 1)
+        features['opp_proximity_share_to_14'] = round(float(np.count_nonzero(distance <= NEAR_OPPONENT) / distance.size), 3)
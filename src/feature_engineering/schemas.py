@@ -0,0 +1,28 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.match_store import MATCH_COLUMNS
+from feature_engineering.timeline_features import TIMELINE_FEATURE_TYPES
+from feature_engineering.labels import LABEL_COLUMNS
+
+# Explicit column types for every pipeline table, so no stage re-infers them from text
+_SQL_TYPES = {'TEXT': 'string', 'INTEGER': 'Int64'}
+
+MATCH_SCHEMA = {name: _SQL_TYPES[kind.split()[0]] for name, kind in MATCH_COLUMNS}
+MATCH_SCHEMA['win'] = 'boolean'
+
+TIMELINE_SCHEMA = {'summoner': 'string', 'match_id': 'string', **TIMELINE_FEATURE_TYPES}
+
+MERGED_SCHEMA = {**MATCH_SCHEMA, **TIMELINE_SCHEMA}
+
+# champion_role_* one-hot columns are added by clean_data and pass through as float64
+CLEANED_SCHEMA = MERGED_SCHEMA
+
+LABELED_SCHEMA = {**CLEANED_SCHEMA, 'lane_score': 'float64', **{column: 'float64' for column in LABEL_COLUMNS}}
+
+TABLE_SCHEMAS = {
+    'parsed_timeline_features': TIMELINE_SCHEMA,
+    'merged_data': MERGED_SCHEMA,
+    'cleaned_data': CLEANED_SCHEMA,
+    'labeled_data': LABELED_SCHEMA,
+}
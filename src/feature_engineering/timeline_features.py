@@ -0,0 +1,454 @@
+import os
+import sys
+import math
+from bisect import bisect_left
+from operator import itemgetter
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.feature_extract_helper import is_boots, calculate_kda
+from feature_engineering.positional import (
+    compute_positional_features, POSITIONAL_FEATURE_DEFAULTS, POSITIONAL_FEATURE_TYPES
+)
+
+# Bump when a feature's definition changes so cached/stored rows can be invalidated
+FEATURE_ENGINE_VERSION = 4
+
+NUM_PARTICIPANTS = 10
+
+# Stat axis of the participant frame array: the participantFrame fields the features read.
+# CS is kept for every frame; the lane stats and position x/y only through the lane window.
+CS_STATS = ['minionsKilled', 'jungleMinionsKilled']
+LANE_STATS = ['totalGold', 'xp', 'level']
+POSITION_STATS = ['x', 'y']
+SCALAR_STATS = CS_STATS + LANE_STATS
+FRAME_STATS = SCALAR_STATS + POSITION_STATS
+STAT_INDEX = {name: i for i, name in enumerate(FRAME_STATS)}
+
+# Per-minute lane differential curves: (stat × minute) float32, player minus opponent
+CURVE_STATS = ['gold', 'cs', 'xp', 'level']
+CURVE_MINUTES = 15
+
+# The lane window runs through the first frame at or after this where every tracked participant
+# is present: the lane curves (and gold_diff_at_N) and positional features never read past it
+LANE_WINDOW_END_MS = CURVE_MINUTES * 60000
+
+# Every feature the engine produces, in output column order, with its value when nothing happened
+TIMELINE_FEATURE_DEFAULTS = {
+    'champion': None,
+    'cs_at_10min': None,
+    'opp_cs_at_10min': None,
+    'first_ward_time': None,
+    'first_death_time': None,
+    'first_kill_or_assist_time': None,
+    'first_item_after_4min_id': None,
+    'first_item_after_4min_time': None,
+    'boots_purchase_time': None,
+    'first_teamfight_join_time': None,
+    'fight_impact_score': 0,
+    'avg_cs_per_min': None,
+    'game_length_minutes': None,
+    'kda': None,
+    'opp_kda': None,
+    'cs_diff_at_10': None,
+    'gold_diff_at_5': None,
+    'gold_diff_at_10': None,
+    'gold_diff_at_15': None,
+    'gold_diff_trend_5_to_10': None,
+    'gold_diff_trend_10_to_15': None,
+    'early_roam': False,
+    'has_early_lane_prio': False,
+    'xp_diff_at_10': None,
+    'level_diff_at_10': None,
+    'gold_diff_slope_1_to_15': None,
+    'cs_diff_slope_1_to_15': None,
+    'gold_diff_min_1_to_15': None,
+    'gold_diff_max_1_to_15': None,
+    'lead_minutes_1_to_15': None,
+    **POSITIONAL_FEATURE_DEFAULTS,
+}
+
+# Column dtype of each feature in the typed pipeline tables (pandas nullable dtypes)
+TIMELINE_FEATURE_TYPES = {
+    'champion': 'string',
+    'cs_at_10min': 'Int64',
+    'opp_cs_at_10min': 'Int64',
+    'first_ward_time': 'float64',
+    'first_death_time': 'float64',
+    'first_kill_or_assist_time': 'float64',
+    'first_item_after_4min_id': 'Int64',
+    'first_item_after_4min_time': 'float64',
+    'boots_purchase_time': 'float64',
+    'first_teamfight_join_time': 'float64',
+    'fight_impact_score': 'Int64',
+    'avg_cs_per_min': 'float64',
+    'game_length_minutes': 'float64',
+    'kda': 'float64',
+    'opp_kda': 'float64',
+    'cs_diff_at_10': 'Int64',
+    'gold_diff_at_5': 'Int64',
+    'gold_diff_at_10': 'Int64',
+    'gold_diff_at_15': 'Int64',
+    'gold_diff_trend_5_to_10': 'Int64',
+    'gold_diff_trend_10_to_15': 'Int64',
+    'early_roam': 'boolean',
+    'has_early_lane_prio': 'boolean',
+    'xp_diff_at_10': 'float64',
+    'level_diff_at_10': 'float64',
+    'gold_diff_slope_1_to_15': 'float64',
+    'cs_diff_slope_1_to_15': 'float64',
+    'gold_diff_min_1_to_15': 'float64',
+    'gold_diff_max_1_to_15': 'float64',
+    'lead_minutes_1_to_15': 'Int64',
+    **POSITIONAL_FEATURE_TYPES,
+}
+
+
+class LaneState:
+    """Running state for one player and their lane opponent while frames stream past."""
+    __slots__ = (
+        'participant_id', 'opp_participant_id', 'features', 'handlers',
+        'kills', 'deaths', 'assists', 'opp_kills', 'opp_deaths', 'opp_assists',
+    )
+
+    def __init__(self, participant_id, opp_participant_id):
+        self.participant_id = participant_id
+        self.opp_participant_id = opp_participant_id
+        self.features = dict(TIMELINE_FEATURE_DEFAULTS)
+        # This player's dispatch table; a handler drops its event type once its features are settled
+        self.handlers = dict(EVENT_HANDLERS)
+        self.kills = self.deaths = self.assists = 0
+        self.opp_kills = self.opp_deaths = self.opp_assists = 0
+
+
+def on_ward_placed(state, event):
+    features = state.features
+    if event.get('creatorId') == state.participant_id and not features['first_ward_time']:
+        features['first_ward_time'] = event['timestamp'] / 1000
+        if features['first_ward_time']:
+            del state.handlers['WARD_PLACED']
+
+
+def on_champion_kill(state, event):
+    pid = state.participant_id
+    opp = state.opp_participant_id
+    killer = event.get('killerId')
+    victim = event.get('victimId')
+    assisting = event.get('assistingParticipantIds', ())
+
+    if victim == pid:
+        features = state.features
+        if not features['first_death_time']:
+            features['first_death_time'] = event['timestamp'] / 1000
+        state.deaths += 1
+
+    if killer == pid or pid in assisting:
+        features = state.features
+        t = event['timestamp'] / 1000
+        if not features['first_kill_or_assist_time']:
+            features['first_kill_or_assist_time'] = t
+        if not features['first_teamfight_join_time'] and len(assisting) >= 2:
+            features['first_teamfight_join_time'] = t
+        if t <= 900:
+            features['fight_impact_score'] += 1
+        if killer == pid:
+            state.kills += 1
+        else:
+            state.assists += 1
+
+    if victim == opp:
+        state.opp_deaths += 1
+    if killer == opp:
+        state.opp_kills += 1
+    elif opp in assisting:
+        state.opp_assists += 1
+
+
+def on_item_purchased(state, event):
+    if event.get('participantId') != state.participant_id:
+        return
+    features = state.features
+    t = event['timestamp'] / 1000
+    item_id = event.get('itemId')
+    if t > 240 and not features['first_item_after_4min_id']:
+        features['first_item_after_4min_id'] = item_id
+        features['first_item_after_4min_time'] = t
+    if is_boots(item_id) and not features['boots_purchase_time']:
+        features['boots_purchase_time'] = t
+    if features['first_item_after_4min_id'] and features['boots_purchase_time']:
+        del state.handlers['ITEM_PURCHASED']
+
+
+# Event type → handler; events of any other type are skipped with a single dict lookup
+EVENT_HANDLERS = {
+    'WARD_PLACED': on_ward_placed,
+    'CHAMPION_KILL': on_champion_kill,
+    'ITEM_PURCHASED': on_item_purchased,
+}
+
+
+class ParticipantFrameBuilder:
+    """
+    Collects the participantFrames of a few participants (the player and their
+    lane opponent) while frames stream past, then hands them over as dense
+    arrays: timestamps (frame,) and stats (frame × participant × stat), with
+    participant_ids[i] at index i. A participant missing from a frame is NaN,
+    as is a position missing from a participant frame. Past the lane window
+    only CS_STATS are read; the other stats of those frames are NaN.
+    """
+
+    def __init__(self, participant_ids):
+        self.pid_keys = [str(pid) for pid in participant_ids]
+        self.timestamps = []
+        # Per frame, the tracked participants' frame dicts (None when absent)
+        self.frame_rows = []
+
+    def add(self, frame):
+        participant_frames = frame.get('participantFrames') or {}
+        self.frame_rows.append(tuple(map(participant_frames.get, self.pid_keys)))
+        self.timestamps.append(frame['timestamp'])
+
+    def lane_window(self):
+        """Number of leading frames in the lane window; see LANE_WINDOW_END_MS."""
+        end = bisect_left(self.timestamps, LANE_WINDOW_END_MS)
+        while end < len(self.frame_rows) and not all(self.frame_rows[end]):
+            end += 1
+        return min(end + 1, len(self.frame_rows))
+
+    def arrays(self):
+        timestamps = np.asarray(self.timestamps, dtype=np.int64)
+        frames = len(timestamps)
+        window = self.lane_window()
+        cs_values = []
+        lane_values = []
+        for pfs in zip(*self.frame_rows):
+            lane_pfs = pfs[:window]
+            try:
+                # Fast path: present in every frame with every stat and a position; read a column at a time
+                positions = list(map(_read_position, lane_pfs))
+                cs_columns = []
+                for read in _CS_READERS:
+                    cs_columns.extend(map(read, pfs))
+                lane_columns = []
+                for read in _LANE_READERS:
+                    lane_columns.extend(map(read, lane_pfs))
+                for read in _POSITION_READERS:
+                    lane_columns.extend(map(read, positions))
+            except (KeyError, TypeError):
+                rows = [_stat_row(pf) for pf in pfs]
+                cs_columns = [row[s] for s in range(len(CS_STATS)) for row in rows]
+                lane_columns = [row[s] for s in range(len(CS_STATS), len(FRAME_STATS)) for row in rows[:window]]
+            cs_values += cs_columns
+            lane_values += lane_columns
+
+        # One conversion per block, then (participant × stat × frame) → (frame × participant × stat)
+        participants = len(self.pid_keys)
+        stats = np.full((frames, participants, len(FRAME_STATS)), np.nan)
+        stats[:, :, :len(CS_STATS)] = np.array(cs_values, dtype=np.float64).reshape(
+            participants, len(CS_STATS), frames
+        ).transpose(2, 0, 1)
+        stats[:window, :, len(CS_STATS):] = np.array(lane_values, dtype=np.float64).reshape(
+            participants, len(FRAME_STATS) - len(CS_STATS), window
+        ).transpose(2, 0, 1)
+        return timestamps, stats
+
+
+_CS_READERS = [itemgetter(stat) for stat in CS_STATS]
+_LANE_READERS = [itemgetter(stat) for stat in LANE_STATS]
+_POSITION_READERS = [itemgetter(axis) for axis in POSITION_STATS]
+_read_position = itemgetter('position')
+
+
+def _stat_row(pf):
+    if not pf:
+        return [np.nan] * len(FRAME_STATS)
+    position = pf.get('position') or {}
+    return [pf.get(stat, 0) for stat in SCALAR_STATS] + [position.get(axis, np.nan) for axis in POSITION_STATS]
+
+
+def load_participant_frames(frames, participant_ids):
+    """Dense (timestamps, stats) arrays for a whole timeline; see ParticipantFrameBuilder."""
+    builder = ParticipantFrameBuilder(participant_ids)
+    for frame in frames:
+        builder.add(frame)
+    return builder.arrays()
+
+
+def _first_nonzero(values, eligible):
+    """
+    Value at the first eligible frame, or None when there is none. CS samples keep
+    moving past a 0 reading, so take the first non-zero one (or 0 if all were).
+    """
+    first = eligible.argmax()
+    if not eligible[first]:
+        return None
+    nonzero = eligible & (values != 0)
+    i = nonzero.argmax()
+    return int(values[i]) if nonzero[i] else 0
+
+
+def compute_frame_features(features, timestamps, stats):
+    """
+    Frame-based features as array lookups over the (frame × participant × stat)
+    stats array, with the player at index 0 and their opponent (if any) at 1.
+    New frame-derived features belong here as array operations.
+    """
+    cs = stats[:, :, STAT_INDEX['minionsKilled']] + stats[:, :, STAT_INDEX['jungleMinionsKilled']]
+    present = ~np.isnan(cs)
+    after_10 = present & (timestamps >= 600000)[:, np.newaxis]
+
+    features['cs_at_10min'] = _first_nonzero(cs[:, 0], after_10[:, 0])
+    if stats.shape[1] > 1:
+        features['opp_cs_at_10min'] = _first_nonzero(cs[:, 1], after_10[:, 1])
+
+    game_duration = int(timestamps[-1]) / 1000
+    final_cs = int(cs[-1, 0]) if present[-1, 0] else 0
+    features['game_length_minutes'] = round(game_duration / 60, 2)
+    if game_duration > 0:
+        features['avg_cs_per_min'] = round(final_cs / (game_duration / 60), 2)
+
+
+# Stat behind each of CURVE_STATS (cs also adds jungleMinionsKilled), and the minute marks
+CURVE_STAT_INDEX = [STAT_INDEX['totalGold'], STAT_INDEX['minionsKilled'], STAT_INDEX['xp'], STAT_INDEX['level']]
+CURVE_MINUTE_NUMBERS = np.arange(1, CURVE_MINUTES + 1)
+CURVE_MINUTE_MS = CURVE_MINUTE_NUMBERS * 60000
+
+
+def compute_lane_curves(timestamps, stats):
+    """
+    Player-minus-opponent gold, CS, XP and level at minutes 1..CURVE_MINUTES as a
+    (CURVE_STATS × CURVE_MINUTES) float32 array, from the same stats layout as
+    compute_frame_features. Each minute takes the first frame at or after it
+    where both players are present; minutes with no such frame (or no opponent)
+    are NaN.
+    """
+    curves = np.full((len(CURVE_STATS), CURVE_MINUTES), np.nan, dtype=np.float32)
+    if stats.shape[1] < 2:
+        return curves
+
+    stat_diff = stats[:, 0, :] - stats[:, 1, :]
+    diff = stat_diff[:, CURVE_STAT_INDEX]
+    diff[:, 1] += stat_diff[:, STAT_INDEX['jungleMinionsKilled']]
+    both = np.flatnonzero(~np.isnan(diff[:, 0]))
+    idx = np.searchsorted(timestamps[both], CURVE_MINUTE_MS)
+    covered = idx < both.size
+    curves[:, covered] = diff[both[idx[covered]]].T
+    return curves
+
+
+def _slopes(curves, known):
+    """Least-squares change per minute of each curve over the known minutes, or Nones with fewer than two."""
+    minutes = CURVE_MINUTE_NUMBERS[known]
+    if minutes.size < 2:
+        return [None] * len(curves)
+    x = minutes - minutes.sum() / minutes.size
+    return [round(slope, 2) for slope in ((curves[:, known] * x).sum(axis=1) / (x * x).sum()).tolist()]
+
+
+def _at_minute(values, minute):
+    value = float(values[minute - 1])
+    return None if math.isnan(value) else value
+
+
+def _int_at_minute(values, minute):
+    value = _at_minute(values, minute)
+    return None if value is None else int(value)
+
+
+def summarize_lane_curves(features, curves):
+    """
+    Scalar summaries of the lane curves, so row-based models see the lane's shape.
+    gold_diff_at_N is the gold curve at minute N: both take the first frame at or
+    after the minute where both players are present.
+    """
+    curves = curves.astype(np.float64)
+    gold, cs, xp, level = curves
+    features['gold_diff_at_5'] = _int_at_minute(gold, 5)
+    features['gold_diff_at_10'] = _int_at_minute(gold, 10)
+    features['gold_diff_at_15'] = _int_at_minute(gold, 15)
+    features['xp_diff_at_10'] = _at_minute(xp, 10)
+    features['level_diff_at_10'] = _at_minute(level, 10)
+
+    # compute_lane_curves fills a whole minute at a time, so every curve is known at the same minutes
+    known = ~np.isnan(gold)
+    features['gold_diff_slope_1_to_15'], features['cs_diff_slope_1_to_15'] = _slopes(curves[:2], known)
+
+    known_gold = gold[known]
+    if known_gold.size:
+        features['gold_diff_min_1_to_15'] = float(known_gold.min())
+        features['gold_diff_max_1_to_15'] = float(known_gold.max())
+        features['lead_minutes_1_to_15'] = int(np.count_nonzero(known_gold > 0))
+
+
+def compute_lane_features(frames, participant_id, opp_participant_id=None, return_curves=False):
+    """
+    Computes every timeline feature in one pass over frames and their events.
+
+    frames can be a list (a loaded timeline) or any iterator (e.g. iter_frames
+    over a stored timeline), so the batch pipeline, the streaming parser and the
+    app all share this one definition. Events are dispatched as they stream past;
+    the player's and opponent's participant frames are collected into dense
+    arrays and the frame features are computed from those afterwards. Returns
+    None when there are no frames.
+
+    With return_curves, returns (features, curves) where curves is the float32
+    array from compute_lane_curves ((None, None) when there are no frames).
+    """
+    state = LaneState(participant_id, opp_participant_id)
+    handler_for = state.handlers.get
+    valid = range(1, NUM_PARTICIPANTS + 1)
+    has_player = participant_id in valid
+    tracked = [participant_id, opp_participant_id] if opp_participant_id in valid else [participant_id]
+    builder = ParticipantFrameBuilder(tracked)
+
+    for frame in frames:
+        builder.add(frame)
+        for event in frame['events']:
+            handler = handler_for(event['type'])
+            if handler is not None:
+                handler(state, event)
+
+    if not builder.timestamps:
+        return (None, None) if return_curves else None
+
+    if has_player:
+        timestamps, stats = builder.arrays()
+        compute_frame_features(state.features, timestamps, stats)
+        curves = compute_lane_curves(timestamps, stats)
+        positions = stats[:, :, STAT_INDEX['x']:]  # POSITION_STATS close FRAME_STATS
+        compute_positional_features(state.features, timestamps, positions)
+    else:
+        curves = np.full((len(CURVE_STATS), CURVE_MINUTES), np.nan, dtype=np.float32)
+    summarize_lane_curves(state.features, curves)
+    finalize_features(state)
+    return (state.features, curves) if return_curves else state.features
+
+
+def finalize_features(state):
+    """Derived metrics that depend on the whole timeline."""
+    features = state.features
+    features['kda'] = calculate_kda(state.kills, state.assists, state.deaths)
+    features['opp_kda'] = calculate_kda(state.opp_kills, state.opp_assists, state.opp_deaths)
+
+    if features['cs_at_10min'] is not None and features['opp_cs_at_10min'] is not None:
+        features['cs_diff_at_10'] = features['cs_at_10min'] - features['opp_cs_at_10min']
+
+    if features['gold_diff_at_5'] is not None and features['gold_diff_at_10'] is not None:
+        features['gold_diff_trend_5_to_10'] = features['gold_diff_at_10'] - features['gold_diff_at_5']
+
+    if features['gold_diff_at_10'] is not None and features['gold_diff_at_15'] is not None:
+        features['gold_diff_trend_10_to_15'] = features['gold_diff_at_15'] - features['gold_diff_at_10']
+
+    # Early roam: left lane before 10 min by position; timelines without positions
+    # fall back to joining a fight before 10 min
+    if features['mid_lane_presence_to_14'] is not None:
+        features['early_roam'] = features['first_roam_time'] is not None and features['first_roam_time'] <= 600
+    elif features['first_teamfight_join_time'] and features['first_teamfight_join_time'] <= 600:
+        features['early_roam'] = True
+
+    # Has early lane prio: any two of cs_diff > 10, gold_diff > 300, early roam
+    prio_flags = [
+        features['cs_diff_at_10'] is not None and features['cs_diff_at_10'] >= 10,
+        features['gold_diff_at_10'] is not None and features['gold_diff_at_10'] >= 300,
+        features['early_roam']
+    ]
+    features['has_early_lane_prio'] = prio_flags.count(True) >= 2
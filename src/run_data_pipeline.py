@@ -1,33 +1,89 @@
-import subprocess
 import os
+import sys
+import argparse
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from utils.pipeline_runner import Stage, select_stages, run_pipeline, print_timings, DATA_DIR
+from utils.pipeline_metrics import append_jsonl, write_prometheus, DEFAULT_METRICS_PATH
+from utils.match_store import DEFAULT_DB_PATH as MATCH_DB_PATH
+from utils.timeline_store import DEFAULT_STORE_DIR, INDEX_FILE
+from utils.feature_store import DEFAULT_DB_PATH as FEATURE_DB_PATH
+from utils.table_io import table_path
+from feature_engineering.champion_roles import ENCODER_PATH
+import stream_pipeline
 
 base_dir = os.path.dirname(__file__)
 
+
+def source(rel_path):
+    return os.path.abspath(os.path.join(base_dir, rel_path))
+
+
+TIMELINE_INDEX = os.path.join(DEFAULT_STORE_DIR, INDEX_FILE)
+LANE_CURVES = os.path.join(DATA_DIR, 'lane_curves.npz')
+
+# Each stage lists the code it depends on next to its data, so editing a feature definition reruns it
 steps = [
-    ("data_collection/fetch_matches.py", "📥 Fetching match data"),
-    ("data_collection/fetch_timelines.py", "🧠 Fetching timeline JSONs"),
-    ("feature_engineering/parse_timeline.py", "📊 Parsing timeline data"),
-    ("data_collection/sync_matches_from_timelines.py", "🔄 Syncing match info from timelines"),
-    ("feature_engineering/merge_matches_and_timeline.py", "🔗 Merging match + timeline data"),
-    ("feature_engineering/clean_data.py", "🧹 Cleaning merged dataset")
+    Stage("fetch_matches", "data_collection.fetch_matches", "📥 Fetching match data",
+          outputs=[MATCH_DB_PATH], argv=[], always=True),
+    Stage("fetch_timelines", "data_collection.fetch_timelines", "🧠 Fetching timeline JSONs",
+          inputs=[MATCH_DB_PATH], outputs=[TIMELINE_INDEX]),
+    Stage("parse_timeline", "feature_engineering.parse_timeline", "📊 Parsing timeline data",
+          inputs=[MATCH_DB_PATH, TIMELINE_INDEX, source("feature_engineering/parse_timeline.py"),
+                  source("feature_engineering/timeline_features.py"), source("feature_engineering/positional.py")],
+          outputs=[table_path('parsed_timeline_features'), LANE_CURVES], argv=[]),
+    Stage("sync_matches", "data_collection.sync_matches_from_timelines", "🔄 Syncing match info from timelines",
+          inputs=[TIMELINE_INDEX], outputs=[MATCH_DB_PATH]),
+    Stage("merge", "feature_engineering.merge_matches_and_timeline", "🔗 Merging match + timeline data",
+          inputs=[MATCH_DB_PATH, table_path('parsed_timeline_features'),
+                  source("feature_engineering/merge_matches_and_timeline.py")],
+          outputs=[table_path('merged_data')], argv=[]),
+    Stage("clean", "feature_engineering.clean_data", "🧹 Cleaning merged dataset",
+          inputs=[table_path('merged_data'), source("feature_engineering/clean_data.py"),
+                  source("feature_engineering/champion_roles.py")],
+          outputs=[table_path('cleaned_data'), ENCODER_PATH]),
+    Stage("label", "feature_engineering.label_lane_score", "🏷️ Labeling lane scores",
+          inputs=[table_path('cleaned_data'), source("feature_engineering/labels.py")],
+          outputs=[table_path('labeled_data')], argv=[]),
+    Stage("feature_store", "feature_engineering.build_feature_store", "🗄️ Storing feature rows",
+          inputs=[table_path('cleaned_data'), LANE_CURVES], outputs=[FEATURE_DB_PATH]),
 ]
 
-print("🚀 Starting League AI Data Pipeline...\n")
 
-for rel_path, description in steps:
-    script_path = os.path.join(base_dir, rel_path)
+def main(argv=None):
+    names = [stage.name for stage in steps]
+    parser = argparse.ArgumentParser(description="Run the data pipeline in one process, skipping up-to-date stages")
+    parser.add_argument('--from', dest='start', choices=names, help='Start at this stage')
+    parser.add_argument('--only', nargs='+', choices=names, help='Run just these stages')
+    parser.add_argument('--force', action='store_true', help='Run selected stages even if they are up to date')
+    parser.add_argument('--list', action='store_true', help='Show the stages and exit')
+    parser.add_argument('--metrics', default=DEFAULT_METRICS_PATH, help='JSON-lines file per-stage metrics are appended to')
+    parser.add_argument('--prometheus', help='Also write this run\'s metrics to a Prometheus textfile')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream new matches through every stage at once (other options go to stream_pipeline.py)')
+    args, stream_args = parser.parse_known_args(argv)
+
+    if args.stream:
+        stream_pipeline.main(stream_args)
+        return True
+    if stream_args:
+        parser.error(f"unrecognized arguments: {' '.join(stream_args)}")
+
+    if args.list:
+        for stage in steps:
+            print(f"{stage.name:<16} {stage.description}")
+        return True
+
+    print("🚀 Starting League AI Data Pipeline...\n")
+    records = run_pipeline(select_stages(steps, args.start, args.only), force=args.force)
+    append_jsonl(records, args.metrics)
+    if args.prometheus:
+        write_prometheus(records, args.prometheus)
 
-    print(f"{description} ({rel_path})")
+    print("\n🏁 Pipeline complete!")
+    print_timings(records)
+    print(f"📈 Stage metrics appended to {args.metrics}")
+    return all(r['status'] != 'failed' for r in records)
 
-    try:
-        subprocess.run(["python", script_path], check=True)
-    except subprocess.CalledProcessError:
-        print(f"❌ {rel_path} failed. Exiting pipeline.")
-        break
-    except FileNotFoundError:
-        print(f"❌ Script not found: {script_path}")
-        break
-    else:
-        print(f"✅ {rel_path} completed\n")
 
-print("\n🏁 Pipeline complete!")
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
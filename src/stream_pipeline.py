@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from utils.riot_helpers import get_client, get_match_data, get_timeline_data, build_match_row
+from utils.match_store import get_match_store
+from utils.timeline_store import get_timeline_store
+from utils.feature_cache import FeatureCache
+from utils.feature_store import get_feature_store
+from utils.table_io import apply_schema
+from utils.stream_runner import StreamStage, run_stream, print_stream_stats
+from utils.pipeline_metrics import record_rows, stage_metrics, new_run_id, append_jsonl, write_prometheus, DEFAULT_METRICS_PATH
+from data_collection.fetch_matches import (
+    load_roster, load_crawl_state, save_crawl_state, discover_new_matches, advance_watermarks, STATE_PATH
+)
+from feature_engineering.parse_timeline import parse_raw, build_jobs
+from feature_engineering.merge_matches_and_timeline import merge_frames
+from feature_engineering.champion_roles import (
+    champion_roles, fit_champion_role_encoder, load_champion_role_encoder, encode_champion_roles
+)
+from feature_engineering.champion_role_map import champion_role_map
+from feature_engineering.timeline_features import FEATURE_ENGINE_VERSION
+from feature_engineering.lane_curves import flatten_curves
+from feature_engineering.labels import compute_labels, DEFAULT_LABEL
+from feature_engineering.schemas import MATCH_SCHEMA, TIMELINE_SCHEMA
+from feature_engineering.feature_rows import FEATURE_ROW_VERSION
+
+
+def role_encoder():
+    """The encoder batch training fitted, or (first run) one over every champion role we know."""
+    try:
+        return load_champion_role_encoder()
+    except FileNotFoundError:
+        print("⚠️ No champion role encoder yet; fitting one on the full champion role map")
+        return fit_champion_role_encoder(pd.DataFrame({'champion': list(champion_role_map)}))
+
+
+def build_stages(args, pool, state, discovered, skipped):
+    """
+    fetch → timeline → parse → merge → clean → label → store, one function per
+    stage. Up to parse each item is one (summoner, match); from merge on, items
+    are DataFrames of up to --batch-rows rows. Matches that turn out not to be
+    midlane games are added to skipped.
+    """
+    match_store = get_match_store()
+    timelines = get_timeline_store()
+    feature_store = get_feature_store()
+    cache = FeatureCache()
+    recorded = match_store.existing_keys()
+    valid, regions = load_roster()
+    encoder = role_encoder()
+    lock = threading.Lock()
+    stored = [0]
+
+    def discover(riot_id):
+        puuid, match_ids, resume_start = discover_new_matches(
+            riot_id, regions[riot_id], state, lock, args.max_new, args.max_per_run
+        )
+        if match_ids is None:
+            print(f"❌ Couldn't list the matches of {riot_id}; it's retried on the next run")
+            return []
+        with lock:
+            discovered[riot_id] = (puuid, match_ids, resume_start)
+        return [(riot_id, match_id) for match_id in match_ids if (riot_id, match_id) not in recorded]
+
+    def fetch_match(job):
+        riot_id, match_id = job
+        data = get_match_data(match_id)
+        if not data:
+            print(f"❌ Error fetching match {match_id}")
+            return []
+        match_info = build_match_row(data, riot_id)
+        if not match_info:
+            with lock:
+                skipped.add(job)
+            return []
+        row = {'summoner': riot_id, **match_info}
+        match_store.upsert_many([row])
+        return [row]
+
+    def fetch_timeline(row):
+        match_id = row['match_id']
+        # get_timeline_data stores what it fetches, so the raw bytes come from the store either way
+        if match_id not in timelines and not get_timeline_data(match_id, use_local=False):
+            return []
+        raw = timelines.get_bytes(match_id)
+        match_store.add_timeline_owners([(row['summoner'], match_id)])
+        return [(row, raw)]
+
+    def parse(item):
+        row, raw = item
+        job = build_jobs([row])[0]
+        features, curves, error = pool.submit(parse_raw, job, raw).result()
+        if error:
+            print(f"❌ {row['match_id']} ({row['summoner']}): {error}")
+        if not features:
+            return []
+        summoner, match_id, participant_id, opp_participant_id = job
+        if opp_participant_id:
+            lane_features = {k: v for k, v in features.items() if k not in ('summoner', 'match_id')}
+            cache.put_many([(match_id, participant_id, opp_participant_id, hashlib.sha1(raw).hexdigest(),
+                             lane_features, curves)], FEATURE_ENGINE_VERSION)
+        return [(row, {**features, **flatten_curves(curves)})]
+
+    def merge(items):
+        matches = apply_schema(pd.DataFrame([row for row, _ in items]).reindex(columns=list(MATCH_SCHEMA)), MATCH_SCHEMA)
+        parsed = apply_schema(pd.DataFrame([features for _, features in items]), TIMELINE_SCHEMA)
+        merged, _, _ = merge_frames(matches, parsed)
+        return [merged] if len(merged) else []
+
+    def clean(df):
+        df = df[df['opp_participant_id'].notna()]
+        df = df[champion_roles(df['champion']).notna().to_numpy()]
+        return [encode_champion_roles(df, encoder)] if len(df) else []
+
+    def label(df):
+        # Same rows label_lane_score keeps: those with the default label
+        labels = compute_labels(df, [DEFAULT_LABEL])
+        df = df[labels[DEFAULT_LABEL].notna().to_numpy()]
+        return [df] if len(df) else []
+
+    def store(df):
+        # Labels aren't stored: training recomputes them from the registry
+        feature_store.upsert_frame(df, FEATURE_ROW_VERSION)
+        record_rows(rows_out=len(df))
+        with lock:
+            stored[0] += len(df)
+            total = stored[0]
+        print(f"🏷️ +{len(df)} labelled rows in the feature store ({total} this run)")
+        return []
+
+    stages = [
+        StreamStage('discover', discover, workers=max(len(set(regions.values())), 1), maxsize=len(valid) or 1),
+        StreamStage('fetch_match', fetch_match, workers=args.fetch_workers, maxsize=args.queue_size),
+        StreamStage('fetch_timeline', fetch_timeline, workers=args.fetch_workers, maxsize=args.queue_size),
+        StreamStage('parse', parse, workers=args.workers, maxsize=args.queue_size),
+        StreamStage('merge', merge, maxsize=args.queue_size, batch_size=args.batch_rows,
+                    flush_seconds=args.flush_seconds),
+        StreamStage('clean', clean, maxsize=4),
+        StreamStage('label', label, maxsize=4),
+        StreamStage('store', store, maxsize=4),
+    ]
+    return valid, stages, cache
+
+
+def stream_stage_records(run_id, stats, seconds):
+    """
+    One metrics record per stream stage. Stages run concurrently, so each gets the
+    stream's wall time plus its own busy time. Up to parse an item is one match;
+    from merge on it is one batch.
+    """
+    return [
+        {
+            'run_id': run_id,
+            'stage': f"stream_{name}",
+            'status': 'ran',
+            'seconds': seconds,
+            'busy_seconds': round(s.busy_seconds, 3),
+            'rows_in': s.items_in,
+            'rows_out': s.items_out,
+            'rows_per_second': round(s.items_out / seconds, 1) if seconds > 0 else None,
+            'errors': s.errors,
+            'max_queued': s.max_queued,
+        }
+        for name, s in stats.items()
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Crawl, parse, clean and label in one streaming pass; rows land in the feature store as they finish"
+    )
+    parser.add_argument('--max-new', type=int, default=200,
+                        help='How far back to crawl for summoners seen for the first time')
+    parser.add_argument('--max-per-run', type=int, default=1000,
+                        help='Cap on new matches per known summoner in one run; older ones follow in later runs')
+    parser.add_argument('--full', action='store_true', help='Ignore watermarks and recrawl from scratch')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parser processes')
+    parser.add_argument('--fetch-workers', type=int, default=8, help='Threads per network stage')
+    parser.add_argument('--queue-size', type=int, default=32, help='Items buffered between stages')
+    parser.add_argument('--batch-rows', type=int, default=200, help='Rows per merge/clean/label batch')
+    parser.add_argument('--flush-seconds', type=float, default=10.0,
+                        help='Hand a partial batch on after this long without new rows')
+    parser.add_argument('--metrics', default=DEFAULT_METRICS_PATH, help='JSON-lines file stream metrics are appended to')
+    parser.add_argument('--prometheus', help='Also write this run\'s metrics to a Prometheus textfile')
+    args = parser.parse_args(argv)
+
+    state = load_crawl_state(STATE_PATH)
+    if args.full:
+        state['watermarks'] = {}
+    discovered = {}
+    skipped = set()
+
+    print("🌊 Starting streaming pipeline...\n")
+    run_id = new_run_id()
+    start = time.perf_counter()
+    with stage_metrics(run_id, 'stream') as metrics:
+        # Spawned workers: the pool starts while fetch threads are running, which fork doesn't handle safely
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            valid, stages, cache = build_stages(args, pool, state, discovered, skipped)
+            stats = run_stream(iter(valid), stages)
+        cache.close()
+        metrics.record(rows_in=stats['fetch_match'].items_in)
+        records = [metrics.finish('ran')]
+    records += stream_stage_records(run_id, stats, records[0]['seconds'])
+    append_jsonl(records, args.metrics)
+    if args.prometheus:
+        write_prometheus(records, args.prometheus)
+
+    # Per summoner, watermarks move over matches whose rows are in the match store (the
+    # batch pipeline rebuilds everything downstream from there) or that aren't midlane
+    # games; a fetch that failed or raised holds its summoner's watermark below it
+    advance_watermarks(state, discovered, get_match_store().existing_keys() | skipped)
+    save_crawl_state(STATE_PATH, state)
+
+    print()
+    print_stream_stats(stats, time.perf_counter() - start)
+    print(f"📈 Stream metrics appended to {args.metrics}")
+    get_client().report()
+    print("ℹ️ Batch tables (merged/cleaned/labeled data) refresh on the next run_data_pipeline.py run")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+
+def _linear(estimator):
+    # Linear models can't take NaN; tree models handle missing values natively
+    return make_pipeline(SimpleImputer(strategy='median'), StandardScaler(), estimator)
+
+
+# Candidate lane-score regressors by name. train_lane_score_model.py --model picks
+# one for production; benchmarks/bench_lane_score_models.py compares them all.
+LANE_SCORE_MODELS = {
+    'random_forest_50': lambda: RandomForestRegressor(n_estimators=50, random_state=42),
+    'random_forest_100': lambda: RandomForestRegressor(n_estimators=100, random_state=42),
+    'random_forest_300': lambda: RandomForestRegressor(n_estimators=300, random_state=42),
+    'random_forest_100_shallow': lambda: RandomForestRegressor(
+        n_estimators=100, max_depth=12, min_samples_leaf=3, random_state=42
+    ),
+    'hist_gradient_boosting': lambda: HistGradientBoostingRegressor(random_state=42),
+    'hist_gradient_boosting_slow': lambda: HistGradientBoostingRegressor(
+        max_iter=400, learning_rate=0.05, random_state=42
+    ),
+    'ridge': lambda: _linear(Ridge(alpha=1.0)),
+    'linear_regression': lambda: _linear(LinearRegression()),
+    'mean_baseline': lambda: DummyRegressor(strategy='mean'),
+}
+
+DEFAULT_MODEL = 'random_forest_100'
+
+
+def make_lane_score_model(name=DEFAULT_MODEL):
+    return LANE_SCORE_MODELS[name]()
@@ -1,29 +1,86 @@
 import os
 import sys
+import time
+import argparse
+import joblib
+from joblib import Parallel, delayed
 
-from train_feature_quality_model import train_stat_quality_model
+from train_feature_quality_model import fit_stat_quality_model, export_response_curve
 
 # Ensure imports work
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from feature_engineering.lane_features import FEATURES_TO_TRAIN
+from feature_engineering.labels import LABEL_COLUMNS
+from feature_engineering.feature_rows import load_training_frame
+
+
+def train_one(df, feature, label_column, model_path):
+    """
+    Fits and saves one feature's model and response curve inside a worker. Returns
+    (feature, class counts, report, fit seconds, error); a failure is returned,
+    not raised, so it doesn't cancel the other features.
+    """
+    try:
+        model, class_counts, report, seconds = fit_stat_quality_model(df, feature, label_column)
+    except Exception as e:
+        return feature, None, None, None, str(e)
+    joblib.dump(model, model_path)
+    export_response_curve(model, df, feature, model_path)
+    return feature, class_counts, report, seconds, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train one quality classifier per feature")
+    parser.add_argument('--label', choices=['lane_score'] + LABEL_COLUMNS, default='lane_score',
+                        help='Label column that decides good vs. bad (see label_lane_score.py --list)')
+    parser.add_argument('--source', choices=['store', 'table'], default='store',
+                        help='Read rows from the feature store (default) or the labeled_data table')
+    parser.add_argument('--n-jobs', type=int, default=-1,
+                        help='Feature models trained at once (-1 = one per core, 1 = sequential)')
+    args = parser.parse_args(argv)
 
-def main():
     base_dir = os.path.dirname(__file__)
-    data_path = os.path.join(base_dir, '..', '..', 'data', 'labeled_data.csv')
     output_dir = os.path.join(base_dir, '..', '..', 'models', 'feature_quality')
+    if args.label != 'lane_score':
+        output_dir = os.path.join(output_dir, args.label)
     os.makedirs(output_dir, exist_ok=True)
 
-    for feature in FEATURES_TO_TRAIN:
-        model_path = os.path.join(output_dir, f'{feature}_quality_model.pkl')
-
-        try:
-            train_stat_quality_model(
-                data_path=data_path,
-                feature_name=feature,
-                output_model_path=model_path,
-            )
-        except Exception as e:
-            print(f"❌ Failed to train model for {feature}: {e}")
+    # Load once; each worker only receives its own feature and the label
+    start = time.perf_counter()
+    df = load_training_frame(args.source)
+    if df is None:
+        print("❌ The feature store has no current rows; run build_feature_store.py (or use --source table)")
+        return
+    load_seconds = time.perf_counter() - start
+    print(f"📂 Loaded {len(df)} rows in {load_seconds:.2f}s; training {len(FEATURES_TO_TRAIN)} models "
+          f"with n_jobs={args.n_jobs}")
+
+    tasks = [
+        delayed(train_one)(
+            df[[c for c in (feature, args.label) if c in df.columns]], feature, args.label,
+            os.path.join(output_dir, f'{feature}_quality_model.pkl')
+        )
+        for feature in FEATURES_TO_TRAIN
+    ]
+    timings = []
+    # Results come back in feature order as they finish, so the printed reports don't interleave
+    for feature, class_counts, report, seconds, error in Parallel(n_jobs=args.n_jobs, return_as='generator')(tasks):
+        if error:
+            print(f"❌ Failed to train model for {feature}: {error}")
+            continue
+        print(f"\n📈 Class distribution for '{feature}':")
+        print(class_counts)
+        print(f"\n📊 Evaluation for '{feature}'")
+        print(report)
+        timings.append((feature, seconds))
+    wall = time.perf_counter() - start
+
+    print(f"✅ {len(timings)} models saved to: {os.path.abspath(output_dir)}")
+    print(f"\n{'feature':<28} {'fit s':>7}")
+    for feature, seconds in timings:
+        print(f"{feature:<28} {seconds:>7.2f}")
+    fit_total = sum(seconds for _, seconds in timings)
+    print(f"⏱️ {fit_total:.2f}s of model fitting in {wall:.2f}s wall time (data load {load_seconds:.2f}s)")
 
 if __name__ == '__main__':
     main()
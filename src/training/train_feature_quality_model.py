@@ -1,9 +1,63 @@
 import os
-import pandas as pd
+import sys
+import time
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 import joblib
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.table_io import read_path
+from utils.feature_feedback import ResponseCurve, response_curve_path
+from feature_engineering.schemas import LABELED_SCHEMA
+
+def fit_stat_quality_model(
+    df,
+    feature_name,
+    label_column='lane_score',
+    quality_threshold=60,
+    test_size=0.2,
+    model_cls=RandomForestClassifier
+):
+    """
+    Fits the good/bad classifier for one stat on an already-loaded frame and
+    returns the model with its class counts, evaluation report and fit time (s).
+    """
+    if feature_name not in df.columns or label_column not in df.columns:
+        raise ValueError(f"Missing required column: {feature_name} or {label_column}")
+
+    df = df[[feature_name, label_column]].dropna()
+    df['is_good'] = (df[label_column] >= quality_threshold).astype(int)
+
+    X = df[[feature_name]]
+    y = df['is_good']
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+
+    start = time.perf_counter()
+    model = model_cls()
+    model.fit(X_train, y_train)
+    seconds = time.perf_counter() - start
+
+    report = classification_report(y_test, model.predict(X_test), zero_division=0)  # ✅ Fix undefined precision
+    return model, y.value_counts(), report, seconds
+
+
+def export_response_curve(model, df, feature_name, model_path):
+    """
+    Tabulates the model over the feature's observed values and saves the table next
+    to the model. Returns the table's path, or None if the feature has no observed values.
+    """
+    curve = ResponseCurve.from_model(model, feature_name, df[feature_name].astype('float64'))
+    path = response_curve_path(model_path)
+    if curve is None:
+        # A curve left by an earlier model would be served instead of this one
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"⚠️ No observed values of {feature_name}; feedback will query the model directly")
+        return None
+    curve.save(path)
+    return path
+
 
 def train_stat_quality_model(
     data_path,
@@ -18,7 +72,7 @@ def train_stat_quality_model(
     Trains a classifier that determines if a given stat is "good" or "bad" for lane performance.
 
     Parameters:
-    - data_path (str): Path to the CSV file with full feature data.
+    - data_path (str): Path to the labeled table (Parquet or CSV) with full feature data.
     - feature_name (str): The column name of the stat to train the model on (e.g. 'first_ward_time').
     - output_model_path (str): Where to save the trained model.
     - label_column (str): Column used to determine good vs. bad performance (default: 'lane_score').
@@ -26,27 +80,17 @@ def train_stat_quality_model(
     - test_size (float): Fraction of data to use for testing.
     - model_cls (sklearn model): Classifier class to use (default: RandomForestClassifier).
     """
-    df = pd.read_csv(data_path)
-
-    if feature_name not in df.columns or label_column not in df.columns:
-        raise ValueError(f"Missing required column: {feature_name} or {label_column}")
+    df = read_path(data_path, LABELED_SCHEMA)
+    model, class_counts, report, _ = fit_stat_quality_model(
+        df, feature_name, label_column, quality_threshold, test_size, model_cls
+    )
 
-    df = df[[feature_name, label_column]].dropna()
-    df['is_good'] = (df[label_column] >= quality_threshold).astype(int)
-    
     print(f"\n📈 Class distribution for '{feature_name}':")
-    print(df['is_good'].value_counts())
-
-    X = df[[feature_name]]
-    y = df['is_good']
-
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
-
-    model = model_cls()
-    model.fit(X_train, y_train)
+    print(class_counts)
 
     print(f"\n📊 Evaluation for '{feature_name}'")
-    print(classification_report(y_test, model.predict(X_test), zero_division=0))  # ✅ Fix undefined precision
+    print(report)
 
     joblib.dump(model, output_model_path)
+    export_response_curve(model, df, feature_name, output_model_path)
     print(f"✅ Model saved to: {output_model_path}")
@@ -1,30 +1,48 @@
 import os
-import pandas as pd
+import sys
+import argparse
 import joblib
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from feature_engineering.labels import LABEL_COLUMNS
+from feature_engineering.feature_rows import load_training_frame, model_input_columns
+from training.lane_score_models import LANE_SCORE_MODELS, DEFAULT_MODEL, make_lane_score_model
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the lane score regressor")
+    parser.add_argument('--label', choices=['lane_score'] + LABEL_COLUMNS, default='lane_score',
+                        help='Label column to train on (see label_lane_score.py --list)')
+    parser.add_argument('--curves', action='store_true',
+                        help='Also train on the per-minute lane differential curves (60 columns)')
+    parser.add_argument('--source', choices=['store', 'table'], default='store',
+                        help='Read rows from the feature store (default) or the labeled_data table')
+    parser.add_argument('--model', choices=list(LANE_SCORE_MODELS), default=DEFAULT_MODEL,
+                        help='Regressor to train (compare them with benchmarks/bench_lane_score_models.py)')
+    args = parser.parse_args(argv)
 
-def main():
     base_dir = os.path.dirname(__file__)
-    input_path = os.path.join(base_dir, '..', '..', 'data', 'labeled_data.csv')
-    model_path = os.path.join(base_dir, '..', '..', 'models', 'lane_score_model.pkl')
+    model_name = 'lane_score_model.pkl' if args.label == 'lane_score' else f'lane_score_model__{args.label}.pkl'
+    model_path = os.path.join(base_dir, '..', '..', 'models', model_name)
 
     # Load data
-    df = pd.read_csv(input_path)
+    df = load_training_frame(args.source, curves=args.curves)
+    if df is None:
+        print("❌ The feature store has no current rows; run build_feature_store.py (or use --source table)")
+        return
 
-    # Drop rows without lane_score
-    df = df[df['lane_score'].notna()]
+    # Drop rows without the chosen label
+    df = df[df[args.label].notna()]
 
-    # Define features and target
-    features = df.drop(columns=['lane_score', 'summoner', 'match_id', 'champion', 'opp_champion', 'opp_summoner'])
-    target = df['lane_score']
+    # Define features and target; no label column may leak into the features
+    features = df[model_input_columns(df, ['lane_score'] + LABEL_COLUMNS, curves=args.curves)]
+    target = df[args.label]
 
     # Train/test split
     X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=42)
 
     # Train model
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    model = make_lane_score_model(args.model)
     model.fit(X_train, y_train)
 
     # Evaluate model
@@ -32,7 +50,7 @@ def main():
     mse = mean_squared_error(y_test, predictions)
     r2 = r2_score(y_test, predictions)
 
-    print(f"✅ Model trained! MSE: {mse:.2f}, R²: {r2:.2f}")
+    print(f"✅ {args.model} trained on {args.label}! MSE: {mse:.2f}, R²: {r2:.2f}")
 
     # Save model
     joblib.dump(model, model_path)
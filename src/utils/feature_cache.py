@@ -0,0 +1,112 @@
+import os
+import json
+import sqlite3
+import threading
+import numpy as np
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+DEFAULT_CACHE_PATH = os.path.join(DATA_DIR, 'feature_cache.sqlite')
+
+
+class FeatureCache:
+    """
+    SQLite cache of extracted lane features, one row per
+    (match_id, participant_id, opp_participant_id).
+
+    Each row remembers the timeline's content hash and the feature engine version
+    it was computed with; a row only counts as a hit when both still match, so a
+    changed timeline or a new engine version is re-parsed automatically. The lane
+    curves are kept alongside as raw float32 bytes.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS timeline_features ("
+            "match_id TEXT NOT NULL, participant_id INTEGER NOT NULL, opp_participant_id INTEGER NOT NULL, "
+            "timeline_hash TEXT NOT NULL, engine_version INTEGER NOT NULL, features TEXT NOT NULL, "
+            "curves BLOB, PRIMARY KEY (match_id, participant_id, opp_participant_id))"
+        )
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(timeline_features)')}
+        if 'curves' not in columns:
+            # Caches from before lane curves existed
+            self.conn.execute('ALTER TABLE timeline_features ADD COLUMN curves BLOB')
+        self.conn.commit()
+
+    @staticmethod
+    def _key(match_id, participant_id, opp_participant_id):
+        # SQLite treats NULLs as distinct in a primary key, so "no opponent" is stored as 0
+        return match_id, participant_id, opp_participant_id or 0
+
+    def lookup(self, engine_version):
+        """
+        Every row computed with engine_version, as
+        {(match_id, participant_id, opp_participant_id): (timeline_hash, features_json, curves_bytes)}.
+        Rows stay serialised until a caller actually uses them.
+        """
+        with self.lock:
+            cur = self.conn.execute(
+                'SELECT match_id, participant_id, opp_participant_id, timeline_hash, features, curves '
+                'FROM timeline_features WHERE engine_version = ?', (engine_version,)
+            )
+            return {(m, p, o): (h, f, c) for m, p, o, h, f, c in cur}
+
+    def get(self, lookup, match_id, participant_id, opp_participant_id, timeline_hash, curve_shape=None):
+        """
+        (features, curves) from a lookup() result, or None if missing, computed
+        from other content, or stored without curves.
+        """
+        hit = lookup.get(self._key(match_id, participant_id, opp_participant_id))
+        if hit is None or hit[0] != timeline_hash or hit[2] is None:
+            return None
+        curves = np.frombuffer(hit[2], dtype=np.float32)
+        return json.loads(hit[1]), curves.reshape(curve_shape) if curve_shape else curves
+
+    def put_many(self, entries, engine_version):
+        """entries: (match_id, participant_id, opp_participant_id, timeline_hash, features, curves) tuples."""
+        values = [
+            (*self._key(m, p, o), h, engine_version, json.dumps(features),
+             np.ascontiguousarray(curves, dtype=np.float32).tobytes())
+            for m, p, o, h, features, curves in entries
+        ]
+        if not values:
+            return 0
+        with self.lock:
+            self.conn.executemany(
+                'INSERT INTO timeline_features '
+                '(match_id, participant_id, opp_participant_id, timeline_hash, engine_version, features, curves) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(match_id, participant_id, opp_participant_id) DO UPDATE SET '
+                'timeline_hash = excluded.timeline_hash, engine_version = excluded.engine_version, '
+                'features = excluded.features, curves = excluded.curves',
+                values
+            )
+            self.conn.commit()
+        return len(values)
+
+    def prune(self, engine_version):
+        """Drops rows from older engine versions; they can never be hits again."""
+        with self.lock:
+            cur = self.conn.execute('DELETE FROM timeline_features WHERE engine_version != ?', (engine_version,))
+            self.conn.commit()
+            return cur.rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_feature_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FeatureCache()
+        return _cache
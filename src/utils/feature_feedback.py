@@ -1,11 +1,108 @@
+import os
+import json
 import numpy as np
 import pandas as pd
 
+CURVE_POINTS = 256
+
+
+def _good_probability(model, X):
+    """P(class 1) for each row of X; constant if the model only ever saw one class."""
+    classes = list(model.classes_)
+    if 1 not in classes:
+        return np.zeros(len(X))
+    return model.predict_proba(X)[:, classes.index(1)]
+
+
+class ResponseCurve:
+    """
+    A quality model's probability of "good" as a function of its one feature,
+    tabulated at training time over the feature's observed range. Feedback
+    interpolates in the table instead of running the forest per request.
+    Outside the observed range the curve is flat, as a tree ensemble is.
+    """
+    __slots__ = ('feature', 'values', 'probabilities')
+
+    def __init__(self, feature, values, probabilities):
+        self.feature = feature
+        self.values = np.asarray(values, dtype=float)
+        self.probabilities = np.asarray(probabilities, dtype=float)
+
+    @classmethod
+    def from_model(cls, model, feature, observed, points=CURVE_POINTS):
+        """
+        Tabulates model over observed values: every distinct value when there are
+        at most `points` of them (booleans, counts), otherwise an even grid from
+        the smallest to the largest. A single observed value gives a one-point
+        (flat) table; with no observed values there is nothing to tabulate and
+        None is returned.
+        """
+        observed = np.asarray(observed, dtype=float)
+        observed = observed[~np.isnan(observed)]
+        if observed.size == 0:
+            return None
+        distinct = np.unique(observed)
+        if len(distinct) <= points:
+            values = distinct
+        else:
+            values = np.linspace(distinct[0], distinct[-1], points)
+        probabilities = _good_probability(model, pd.DataFrame({feature: values}))
+        return cls(feature, values, np.round(probabilities, 4))
+
+    def probability(self, value):
+        return float(np.interp(float(value), self.values, self.probabilities))
+
+    def suggest(self, target_score=0.8):
+        """
+        The value whose probability is closest to target_score. When the curve
+        crosses the target next to that point, the crossing is interpolated.
+        """
+        gap = self.probabilities - target_score
+        best = int(np.argmin(np.abs(gap)))
+        for neighbour in (best - 1, best + 1):
+            if 0 <= neighbour < len(gap) and gap[best] * gap[neighbour] < 0:
+                x0, x1 = self.values[best], self.values[neighbour]
+                y0, y1 = gap[best], gap[neighbour]
+                return float(x0 + (x1 - x0) * y0 / (y0 - y1))
+        return float(self.values[best])
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'feature': self.feature,
+                'values': self.values.tolist(),
+                'probabilities': self.probabilities.tolist(),
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['feature'], data['values'], data['probabilities'])
+
+
+def response_curve_path(model_path):
+    """Where a quality model's response curve lives: next to its .pkl."""
+    return os.path.splitext(model_path)[0] + '_curve.json'
+
+
+def good_probability(model, feature_name, value):
+    """Probability that value is "good", from a ResponseCurve or a fitted classifier."""
+    if isinstance(model, ResponseCurve):
+        return model.probability(value)
+    df = pd.DataFrame([{feature_name: value}])
+    return float(_good_probability(model, df[model.feature_names_in_])[0])
+
+
 def suggest_target_value(model, feature_name, current_value, target_score=0.8, value_range=None, step=5):
     """
     Suggest a better value for a single feature to achieve a higher chance of being 'good'.
-    Works with classifiers using .predict_proba().
+    With a ResponseCurve this is a table lookup; classifiers using .predict_proba()
+    (models trained before curves were exported) are probed over value_range.
     """
+    if isinstance(model, ResponseCurve):
+        return model.suggest(target_score)
+
     if value_range is None:
         value_range = (0, 1000)
 
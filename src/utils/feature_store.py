@@ -0,0 +1,137 @@
+import os
+import json
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, 'feature_store.sqlite')
+
+# Where a row came from: the batch/stream pipeline (cleaned, trainable) or an app analysis
+PIPELINE_SOURCE = 'pipeline'
+APP_SOURCE = 'app'
+
+
+def _json_default(value):
+    # NumPy scalars that survive the object conversion
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+def _records(df):
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+class FeatureStore:
+    """
+    Model-ready feature rows keyed by (match_id, participant_id).
+
+    Each row is the full input the lane-score model and the feedback see: match
+    stats, timeline features, champion-role encoding and lane curve columns. Rows
+    record the feature version they were built with; reads ask for a version, so
+    rows built by older feature definitions are never served as current.
+    The batch pipeline fills the store and training reads it; the app serves a
+    stored row directly and only computes rows for matches the crawler hasn't seen.
+    Rows the app computes are stored with source 'app': they skip clean_data's
+    filters, so frame() leaves them out of training by default, and they never
+    replace a pipeline row.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS features ("
+            "match_id TEXT NOT NULL, participant_id INTEGER NOT NULL, summoner TEXT, "
+            "feature_version INTEGER NOT NULL, row TEXT NOT NULL, "
+            f"source TEXT NOT NULL DEFAULT '{PIPELINE_SOURCE}', "
+            "PRIMARY KEY (match_id, participant_id))"
+        )
+        columns = {name for _, name, *_ in self.conn.execute('PRAGMA table_info(features)')}
+        if 'source' not in columns:
+            # Stores created before rows had a source; everything in them came from the pipeline
+            self.conn.execute(f"ALTER TABLE features ADD COLUMN source TEXT NOT NULL DEFAULT '{PIPELINE_SOURCE}'")
+        self.conn.execute('CREATE INDEX IF NOT EXISTS features_by_summoner ON features (summoner, match_id)')
+        self.conn.commit()
+
+    def upsert_frame(self, df, feature_version, source=PIPELINE_SOURCE):
+        """
+        Stores every row of df (which needs match_id, participant_id and summoner
+        columns). A pipeline row replaces any row; an app row only replaces app rows.
+        """
+        values = [
+            (row['match_id'], int(row['participant_id']), row.get('summoner'), feature_version,
+             json.dumps(row, default=_json_default), source)
+            for row in _records(df)
+        ]
+        with self.lock:
+            self.conn.executemany(
+                'INSERT INTO features (match_id, participant_id, summoner, feature_version, row, source) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(match_id, participant_id) DO UPDATE SET summoner = excluded.summoner, '
+                'feature_version = excluded.feature_version, row = excluded.row, source = excluded.source '
+                f"WHERE excluded.source = '{PIPELINE_SOURCE}' OR features.source = excluded.source",
+                values
+            )
+            self.conn.commit()
+        return len(values)
+
+    def get(self, match_id, participant_id, feature_version):
+        with self.lock:
+            found = self.conn.execute(
+                'SELECT row FROM features WHERE match_id = ? AND participant_id = ? AND feature_version = ?',
+                (match_id, participant_id, feature_version)
+            ).fetchone()
+        return json.loads(found[0]) if found else None
+
+    def find(self, match_id, summoner, feature_version):
+        """A summoner's row for a match, or None; summoner is a normalised Riot ID."""
+        with self.lock:
+            found = self.conn.execute(
+                'SELECT row FROM features WHERE summoner = ? AND match_id = ? AND feature_version = ?',
+                (summoner, match_id, feature_version)
+            ).fetchone()
+        return json.loads(found[0]) if found else None
+
+    def frame(self, feature_version, source=PIPELINE_SOURCE):
+        """
+        Every row built with feature_version, as a DataFrame in insertion order.
+        Only pipeline rows by default; source=None includes the app's rows too.
+        """
+        query = 'SELECT row FROM features WHERE feature_version = ?'
+        params = [feature_version]
+        if source is not None:
+            query += ' AND source = ?'
+            params.append(source)
+        with self.lock:
+            rows = [json.loads(row) for (row,) in self.conn.execute(query + ' ORDER BY rowid', params)]
+        return pd.DataFrame(rows)
+
+    def count(self, feature_version=None):
+        with self.lock:
+            if feature_version is None:
+                return self.conn.execute('SELECT COUNT(*) FROM features').fetchone()[0]
+            return self.conn.execute(
+                'SELECT COUNT(*) FROM features WHERE feature_version = ?', (feature_version,)
+            ).fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_feature_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FeatureStore()
+        return _store
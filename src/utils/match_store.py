@@ -0,0 +1,177 @@
+import os
+import csv
+import sqlite3
+import threading
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.riot_helpers import normalize_summoner
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, 'matches.sqlite')
+LEGACY_CSV_PATH = os.path.join(DATA_DIR, 'midlane_matches.csv')
+
+MATCH_COLUMNS = [
+    ('summoner', 'TEXT NOT NULL'),
+    ('match_id', 'TEXT NOT NULL'),
+    ('champion', 'TEXT'),
+    ('participant_id', 'INTEGER'),
+    ('opp_participant_id', 'INTEGER'),
+    ('win', 'INTEGER'),
+    ('kills', 'INTEGER'),
+    ('deaths', 'INTEGER'),
+    ('assists', 'INTEGER'),
+    ('cs', 'INTEGER'),
+    ('duration', 'INTEGER'),
+    ('opp_kills', 'INTEGER'),
+    ('opp_deaths', 'INTEGER'),
+    ('opp_assists', 'INTEGER'),
+    ('opp_cs', 'INTEGER'),
+    ('opp_champion', 'TEXT'),
+    ('opp_summoner', 'TEXT'),
+]
+MATCH_FIELDS = [name for name, _ in MATCH_COLUMNS]
+
+
+def _to_db(field, value):
+    if value in ('', 'None'):
+        return None
+    if field == 'win' and isinstance(value, str):
+        return 1 if value.lower() == 'true' else 0
+    return value
+
+
+class MatchStore:
+    """
+    SQLite store for midlane match rows, keyed by (summoner, match_id).
+
+    Replaces rewriting midlane_matches.csv on every run: writers upsert in bulk,
+    readers get O(1) existence checks from the primary key index.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        columns = ', '.join(f"{name} {kind}" for name, kind in MATCH_COLUMNS)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS matches ({columns}, PRIMARY KEY (summoner, match_id))"
+        )
+        # Timelines are stored once per match; this records which tracked summoners played in it
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS timeline_owners ("
+            "summoner TEXT NOT NULL, match_id TEXT NOT NULL, PRIMARY KEY (summoner, match_id))"
+        )
+        self.conn.commit()
+
+    def upsert_many(self, rows):
+        """Inserts rows, replacing any existing row with the same (summoner, match_id)."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        placeholders = ', '.join('?' for _ in MATCH_FIELDS)
+        updates = ', '.join(f"{f} = excluded.{f}" for f in MATCH_FIELDS[2:])
+        sql = (
+            f"INSERT INTO matches ({', '.join(MATCH_FIELDS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(summoner, match_id) DO UPDATE SET {updates}"
+        )
+        values = [tuple(_to_db(f, row.get(f)) for f in MATCH_FIELDS) for row in rows]
+        with self.lock:
+            self.conn.executemany(sql, values)
+            self.conn.commit()
+        return len(values)
+
+    def exists(self, summoner, match_id):
+        with self.lock:
+            cur = self.conn.execute(
+                'SELECT 1 FROM matches WHERE summoner = ? AND match_id = ?', (summoner, match_id)
+            )
+            return cur.fetchone() is not None
+
+    def existing_keys(self):
+        with self.lock:
+            return set(self.conn.execute('SELECT summoner, match_id FROM matches'))
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM matches').fetchone()[0]
+
+    def rows(self):
+        """All rows as dicts in insertion order, with `win` as a bool like the old CSV."""
+        return [row for batch in self.iter_rows() for row in batch]
+
+    def iter_rows(self, batch_size=100_000):
+        """Rows as in rows(), in lists of at most batch_size, for callers that can't hold them all."""
+        with self.lock:
+            cur = self.conn.cursor()
+            cur.execute(f"SELECT {', '.join(MATCH_FIELDS)} FROM matches ORDER BY rowid")
+        while True:
+            with self.lock:
+                batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            result = [dict(zip(MATCH_FIELDS, values)) for values in batch]
+            for row in result:
+                if row['win'] is not None:
+                    row['win'] = bool(row['win'])
+            yield result
+
+    def add_timeline_owners(self, pairs):
+        """Records (summoner, match_id) pairs whose timeline is in the timeline store."""
+        pairs = list(pairs)
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO timeline_owners (summoner, match_id) VALUES (?, ?)', pairs
+            )
+            self.conn.commit()
+        return len(pairs)
+
+    def timeline_owners(self):
+        with self.lock:
+            return list(self.conn.execute('SELECT summoner, match_id FROM timeline_owners ORDER BY rowid'))
+
+    def import_csv(self, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        # Older sync runs stored file-safe names (Name-TAG); key everything by Riot ID
+        for row in rows:
+            row['summoner'] = normalize_summoner(row['summoner'])
+        return self.upsert_many(rows)
+
+    def export_csv(self, path):
+        rows = self.rows()
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=MATCH_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_match_store():
+    """
+    Shared store for this process. The first time it is opened on an empty
+    database, an existing midlane_matches.csv is imported so nothing is lost.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MatchStore()
+            if _store.count() == 0 and os.path.exists(LEGACY_CSV_PATH):
+                imported = _store.import_csv(LEGACY_CSV_PATH)
+                print(f"📦 Imported {imported} rows from {LEGACY_CSV_PATH} into {_store.db_path}")
+        return _store
+
+
+if __name__ == '__main__':
+    # Handy for inspecting the store in a spreadsheet
+    count = get_match_store().export_csv(LEGACY_CSV_PATH)
+    print(f"✅ Exported {count} matches to {LEGACY_CSV_PATH}")
@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.riot_helpers import get_client
+from utils.response_cache import get_cache
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+DEFAULT_METRICS_PATH = os.path.join(DATA_DIR, 'pipeline_metrics.jsonl')
+PROMETHEUS_PREFIX = 'league_pipeline'
+
+API_COUNTERS = ['requests', 'ok', 'errors', 'retries', 'rate_limited']
+CACHE_COUNTERS = ['hits', 'misses', 'evictions']
+
+# Gauges exported to Prometheus, in output order: (record key, help text)
+PROMETHEUS_GAUGES = [
+    ('seconds', 'Wall time of the stage in seconds'),
+    ('rows_in', 'Rows the stage read'),
+    ('rows_out', 'Rows the stage wrote'),
+    ('rows_per_second', 'Rows written per second of wall time'),
+    ('api_requests', 'Riot API requests made'),
+    ('api_retries', 'Riot API retries'),
+    ('api_rate_limited', 'Riot API 429 responses'),
+    ('api_errors', 'Riot API requests that failed for good'),
+    ('response_cache_hit_rate', 'Hit rate of the API response cache'),
+    ('peak_rss_mb', 'Peak resident memory of the pipeline process so far, MB'),
+    ('children_peak_rss_mb', 'Peak resident memory of any finished worker process, MB'),
+]
+
+
+def _max_rss_mb(children=False):
+    """Peak RSS in MB of this process (or its finished children), or None where resource is missing."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return round((rss if sys.platform == 'darwin' else rss * 1024) / 2 ** 20, 1)
+
+
+class StageMetrics:
+    """
+    Counters for one stage run. API and response-cache counters are the shared
+    client's and cache's totals, taken as a difference over the stage; rows and
+    any stage-specific counters are reported by the stage through record().
+    """
+
+    def __init__(self, run_id, stage):
+        self.run_id = run_id
+        self.stage = stage
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.api_before = self._api()
+        self.cache_before = self._cache()
+        self.rss_before = _max_rss_mb()
+
+    @staticmethod
+    def _api():
+        stats = get_client().throughput()
+        return {key: stats[key] for key in API_COUNTERS}
+
+    @staticmethod
+    def _cache():
+        stats = get_cache().stats()
+        return {key: stats[key] for key in CACHE_COUNTERS}
+
+    def record(self, **counters):
+        with self.lock:
+            for key, value in counters.items():
+                if value is not None:
+                    self.counters[key] = self.counters.get(key, 0) + value
+
+    def finish(self, status):
+        seconds = time.perf_counter() - self.start
+        api = {key: value - self.api_before[key] for key, value in self._api().items()}
+        cache = {key: value - self.cache_before[key] for key, value in self._cache().items()}
+        lookups = cache['hits'] + cache['misses']
+        peak = _max_rss_mb()
+
+        record = {
+            'run_id': self.run_id,
+            'stage': self.stage,
+            'status': status,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'seconds': round(seconds, 3),
+            'rows_in': None,
+            'rows_out': None,
+            'rows_per_second': None,
+        }
+        record.update(self.counters)
+        if record['rows_out'] is not None and seconds > 0:
+            record['rows_per_second'] = round(record['rows_out'] / seconds, 1)
+        record.update({f'api_{key}': value for key, value in api.items()})
+        record.update({
+            'response_cache_hits': cache['hits'],
+            'response_cache_misses': cache['misses'],
+            'response_cache_hit_rate': round(cache['hits'] / lookups, 3) if lookups else None,
+            'peak_rss_mb': peak,
+            'rss_growth_mb': round(peak - self.rss_before, 1) if peak is not None else None,
+            'children_peak_rss_mb': _max_rss_mb(children=True),
+        })
+        return record
+
+
+_current = None
+
+
+def record_rows(rows_in=None, rows_out=None, **counters):
+    """
+    Reports a stage's row counts (and any other counters, e.g. cache hits) to the
+    metrics of the running pipeline stage. A no-op when the stage runs on its own.
+    """
+    if _current is not None:
+        _current.record(rows_in=rows_in, rows_out=rows_out, **counters)
+
+
+@contextmanager
+def stage_metrics(run_id, stage):
+    global _current
+    _current = metrics = StageMetrics(run_id, stage)
+    try:
+        yield metrics
+    finally:
+        _current = None
+
+
+def new_run_id():
+    return time.strftime('%Y%m%dT%H%M%S')
+
+
+def skipped_record(run_id, stage):
+    return {'run_id': run_id, 'stage': stage, 'status': 'skipped', 'seconds': 0.0,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def append_jsonl(records, path=DEFAULT_METRICS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def write_prometheus(records, path):
+    """
+    Writes the run's stage metrics in Prometheus text format, for node_exporter's
+    textfile collector. The file is replaced atomically, so a scrape never sees
+    half a run.
+    """
+    lines = []
+    for key, help_text in PROMETHEUS_GAUGES:
+        name = f"{PROMETHEUS_PREFIX}_stage_{key}"
+        samples = [
+            f'{name}{{stage="{r["stage"]}",status="{r["status"]}"}} {r[key]}'
+            for r in records if r.get(key) is not None
+        ]
+        if samples:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", *samples]
+    if records:
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}_last_run_timestamp_seconds When the last pipeline run finished",
+            f"# TYPE {PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds {time.time():.0f}",
+        ]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp, path)
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import hashlib
+import importlib
+from utils.pipeline_metrics import stage_metrics, skipped_record, new_run_id
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+DEFAULT_STATE_PATH = os.path.join(DATA_DIR, 'pipeline_state.json')
+
+
+class Stage:
+    """
+    One pipeline step: the module whose main() runs it, plus the files it reads
+    and writes. argv is passed to main() for argparse stages (None calls main()
+    with no arguments). A stage with always=True has inputs the runner can't see
+    (e.g. the Riot API) and never counts as up to date.
+    """
+    __slots__ = ('name', 'module', 'description', 'inputs', 'outputs', 'argv', 'always')
+
+    def __init__(self, name, module, description, inputs=(), outputs=(), argv=None, always=False):
+        self.name = name
+        self.module = module
+        self.description = description
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.argv = argv
+        self.always = always
+
+
+def _files(path):
+    # A SQLite database in WAL mode keeps recent writes in the -wal file next to it
+    return [p for p in (path, path + '-wal') if os.path.exists(p)]
+
+
+def _mtime(path):
+    return max(os.path.getmtime(p) for p in _files(path))
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-1 over a file (and its SQLite WAL, if any); None if it doesn't exist."""
+    files = _files(path)
+    if not files:
+        return None
+    digest = hashlib.sha1()
+    for p in files:
+        with open(p, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_state(path=DEFAULT_STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state, path=DEFAULT_STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def stale_reason(stage, state):
+    """
+    Why a stage has to run, or None if it's up to date. Outputs newer than every
+    input are up to date; otherwise the inputs' content hashes are compared with
+    the ones recorded after the stage last succeeded, so a touched-but-unchanged
+    input (or a stage that rewrites its own input) doesn't force a rerun.
+    """
+    if stage.always:
+        return 'always runs'
+    if not stage.outputs:
+        return 'no declared outputs'
+    missing = [p for p in stage.outputs if not _files(p)]
+    if missing:
+        return f"missing output {os.path.basename(missing[0])}"
+    inputs = [p for p in stage.inputs if _files(p)]
+    if not inputs:
+        return None
+    if max(_mtime(p) for p in inputs) <= min(_mtime(p) for p in stage.outputs):
+        return None
+
+    recorded = state.get(stage.name, {}).get('inputs', {})
+    changed = [p for p in inputs if recorded.get(p) != file_digest(p)]
+    return f"{os.path.basename(changed[0])} changed" if changed else None
+
+
+def select_stages(stages, start=None, only=None):
+    names = [stage.name for stage in stages]
+    for name in ([start] if start else []) + (only or []):
+        if name not in names:
+            raise ValueError(f"Unknown stage {name!r} (stages: {', '.join(names)})")
+    if only:
+        return [stage for stage in stages if stage.name in only]
+    if start:
+        return stages[names.index(start):]
+    return list(stages)
+
+
+def run_stage(stage):
+    module = importlib.import_module(stage.module)
+    if stage.argv is None:
+        module.main()
+    else:
+        module.main(list(stage.argv))
+
+
+def run_pipeline(stages, force=False, state_path=DEFAULT_STATE_PATH, run_id=None):
+    """
+    Runs stages in order in this interpreter, skipping those whose outputs are up
+    to date. Stops at the first stage that raises. Returns one metrics record per
+    stage (see utils.pipeline_metrics) with status 'ran', 'skipped' or 'failed'.
+    """
+    run_id = run_id or new_run_id()
+    state = load_state(state_path)
+    records = []
+    for stage in stages:
+        reason = 'forced' if force else stale_reason(stage, state)
+        if reason is None:
+            print(f"⏭️ {stage.description} ({stage.name}) — up to date\n")
+            records.append(skipped_record(run_id, stage.name))
+            continue
+
+        print(f"{stage.description} ({stage.name}: {reason})")
+        with stage_metrics(run_id, stage.name) as metrics:
+            try:
+                run_stage(stage)
+            except (Exception, SystemExit) as e:
+                records.append(metrics.finish('failed'))
+                print(f"❌ {stage.name} failed after {records[-1]['seconds']:.1f}s: {e!r}. Exiting pipeline.")
+                break
+            records.append(metrics.finish('ran'))
+        elapsed = records[-1]['seconds']
+
+        # Hash inputs after the run: that's the state the outputs were built from
+        state[stage.name] = {
+            'inputs': {p: file_digest(p) for p in stage.inputs if _files(p)},
+            'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seconds': elapsed,
+        }
+        save_state(state, state_path)
+        print(f"✅ {stage.name} completed in {elapsed:.1f}s\n")
+    return records
+
+
+def _cell(value, fmt):
+    return format(value if value is not None else '-', fmt)
+
+
+def print_timings(records):
+    print(f"{'stage':<16} {'status':<8} {'seconds':>8} {'rows in':>9} {'rows out':>9} {'rows/s':>9} "
+          f"{'API req':>8} {'429s':>5} {'peak MB':>8}")
+    for r in records:
+        print(f"{r['stage']:<16} {r['status']:<8} {r['seconds']:>8.2f} {_cell(r.get('rows_in'), '>9')} "
+              f"{_cell(r.get('rows_out'), '>9')} {_cell(r.get('rows_per_second'), '>9')} "
+              f"{_cell(r.get('api_requests'), '>8')} {_cell(r.get('api_rate_limited'), '>5')} "
+              f"{_cell(r.get('peak_rss_mb'), '>8')}")
+    print(f"{'total':<16} {'':<8} {sum(r['seconds'] for r in records):>8.2f}")
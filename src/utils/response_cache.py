@@ -0,0 +1,125 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "RIOT_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'cache'))
+)
+DEFAULT_CACHE_MAX_MB = int(os.getenv("RIOT_CACHE_MAX_MB", "2048"))
+
+
+class ResponseCache:
+    """
+    On-disk cache for Riot API responses, shared by the app and the batch pipeline.
+
+    Entries are addressed by a hash of (endpoint, key), stored gzip-compressed,
+    and evicted least-recently-used first once the directory grows past max_bytes.
+    A hit touches the file's mtime, so recency survives across processes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, endpoint, key):
+        digest = hashlib.sha256(f"{endpoint}:{key}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json.gz")
+
+    def get(self, endpoint, key):
+        path = self._path(endpoint, key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return data
+
+    def put(self, endpoint, key, data):
+        path = self._path(endpoint, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file first so readers never see a half-written entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(data, f, separators=(',', ':'))
+        size = os.path.getsize(tmp_path)
+        with self.lock:
+            # Overwriting an entry replaces its bytes rather than adding to them
+            try:
+                size -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+
+            if self.total_bytes is None:
+                self.total_bytes = self._scan_size()
+            else:
+                self.total_bytes += size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json.gz'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Trim to 90% so we don't rescan the directory on every put near the limit
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries())
+        self.total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -1,26 +1,450 @@
 import requests
 import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from utils.response_cache import get_cache
+from utils.timeline_store import get_timeline_store
 
 load_dotenv()
 API_KEY = os.getenv("RIOT_API_KEY")
 HEADERS = {"X-Riot-Token": API_KEY}
-ROUTING = 'americas'
+
+# Platform IDs (the prefix of a match ID) → regional routing cluster
+PLATFORM_REGIONS = {
+    'NA1': 'americas', 'BR1': 'americas', 'LA1': 'americas', 'LA2': 'americas',
+    'EUW1': 'europe', 'EUN1': 'europe', 'TR1': 'europe', 'RU': 'europe', 'ME1': 'europe',
+    'KR': 'asia', 'JP1': 'asia',
+    'OC1': 'sea', 'PH2': 'sea', 'SG2': 'sea', 'TH2': 'sea', 'TW2': 'sea', 'VN2': 'sea',
+}
+DEFAULT_PLATFORM = os.getenv("RIOT_PLATFORM", "NA1")
+
+def region_for_platform(platform):
+    region = PLATFORM_REGIONS.get((platform or DEFAULT_PLATFORM).upper())
+    if region is None:
+        raise ValueError(f"Unknown platform: {platform}")
+    return region
+
+def region_for_match_id(match_id):
+    return region_for_platform(match_id.split('_', 1)[0])
+
+def account_region_for(region):
+    # account-v1 isn't served from sea; asia is the nearest cluster that has it
+    return 'asia' if region == 'sea' else region
+
+ROUTING = region_for_platform(DEFAULT_PLATFORM)
+
+# Point this at a local stub server (e.g. http://127.0.0.1:8000) to exercise the client offline
+API_HOST = os.getenv("RIOT_API_HOST", "https://{routing}.api.riotgames.com")
+
+# Development key defaults; the real limits are picked up from response headers
+DEFAULT_APP_RATE_LIMIT = os.getenv("RIOT_APP_RATE_LIMIT", "20:1,100:120")
+DEFAULT_MAX_WORKERS = int(os.getenv("RIOT_MAX_WORKERS", "16"))
+
+
+def parse_rate_limit_header(value):
+    """
+    Parses a Riot rate limit header such as "20:1,100:120" into [(20, 1), (100, 120)].
+    """
+    windows = []
+    for part in (value or '').split(','):
+        if ':' not in part:
+            continue
+        limit, seconds = part.split(':', 1)
+        try:
+            windows.append((int(limit), int(seconds)))
+        except ValueError:
+            continue
+    return windows
+
+
+class RateLimitBucket:
+    """
+    Token bucket for one Riot rate limit (app or method).
+
+    Each (limit, window) pair holds `limit` tokens. A spent token is handed back
+    `window` seconds after it was spent, which keeps every sliding window within
+    the limit instead of only the average rate. A 429 with Retry-After freezes
+    the whole bucket until the server says it is safe again.
+    """
+
+    def __init__(self, windows, safety_margin=0.05):
+        self.lock = threading.Lock()
+        self.safety_margin = safety_margin
+        self.blocked_until = 0.0
+        self.windows = []
+        self.spent = {}
+        self.set_limits(windows)
+
+    def set_limits(self, windows):
+        with self.lock:
+            windows = sorted(set(windows), key=lambda w: w[1])
+            if windows == self.windows:
+                return
+            # Carry recent spending over so a limit change can't reopen a full window
+            history = max(self.spent.values(), key=len, default=deque())
+            self.windows = windows
+            self.spent = {w: self.spent.get(w, deque(history)) for w in windows}
+
+    def block_for(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def _wait_time(self, now):
+        wait = max(0.0, self.blocked_until - now)
+        for (limit, seconds), spent in self.spent.items():
+            while spent and now - spent[0] >= seconds + self.safety_margin:
+                spent.popleft()
+            if len(spent) >= limit:
+                wait = max(wait, spent[0] + seconds + self.safety_margin - now)
+        return wait
+
+
+def acquire_all(buckets):
+    """
+    Blocks until every bucket has a token, then takes one from each atomically.
+    Buckets are locked in a fixed order so concurrent callers can't deadlock.
+    """
+    buckets = sorted(set(buckets), key=id)
+    while True:
+        for bucket in buckets:
+            bucket.lock.acquire()
+        try:
+            now = time.monotonic()
+            wait = max(bucket._wait_time(now) for bucket in buckets)
+            if wait <= 0:
+                for bucket in buckets:
+                    for spent in bucket.spent.values():
+                        spent.append(now)
+                return
+        finally:
+            for bucket in buckets:
+                bucket.lock.release()
+        time.sleep(wait)
+
+
+class RegionLimits:
+    """
+    Rate-limit state for one regional cluster. Riot enforces app and method
+    limits per region, so each cluster gets its own buckets and its own worker
+    pool; a backlog in one region never holds up requests to another.
+    """
+
+    def __init__(self, region, max_workers):
+        self.region = region
+        self.app_bucket = RateLimitBucket(parse_rate_limit_header(DEFAULT_APP_RATE_LIMIT))
+        self.method_buckets = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'riot-{region}')
+        self.stats = {'requests': 0, 'ok': 0, 'errors': 0, 'retries': 0, 'rate_limited': 0}
+
+
+class RiotClient:
+    """
+    Thread-pool Riot API client shared by the collectors.
+
+    Requests go through their region's app-wide bucket plus one bucket per API
+    method, so many requests can be in flight while staying under both limits.
+    """
+
+    def __init__(self, api_key=None, max_workers=DEFAULT_MAX_WORKERS, max_retries=4,
+                 timeout=10, region=ROUTING, host=API_HOST):
+        self.headers = {"X-Riot-Token": api_key or API_KEY}
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.default_region = region
+        self.host = host
+        self.regions = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started_at = time.monotonic()
+
+    def url(self, path, region):
+        return self.host.format(routing=region) + path
+
+    def _session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self.local.session = session
+        return session
+
+    def _region(self, region):
+        region = region or self.default_region
+        with self.lock:
+            if region not in self.regions:
+                self.regions[region] = RegionLimits(region, self.max_workers)
+            return self.regions[region]
+
+    def _method_bucket(self, limits, method):
+        with self.lock:
+            if method not in limits.method_buckets:
+                # Unknown until the first response tells us; start permissive
+                limits.method_buckets[method] = RateLimitBucket([])
+            return limits.method_buckets[method]
+
+    def _count(self, limits, key):
+        with self.lock:
+            limits.stats[key] += 1
+
+    def _update_limits(self, res, limits, method_bucket):
+        app_limits = parse_rate_limit_header(res.headers.get('X-App-Rate-Limit'))
+        if app_limits:
+            limits.app_bucket.set_limits(app_limits)
+        method_limits = parse_rate_limit_header(res.headers.get('X-Method-Rate-Limit'))
+        if method_limits:
+            method_bucket.set_limits(method_limits)
+
+    def get(self, path, method, params=None, region=None):
+        """
+        Fetches one endpoint from a regional cluster, honouring rate limits and Retry-After.
+        Returns the decoded JSON on 200, otherwise None.
+        """
+        limits = self._region(region)
+        method_bucket = self._method_bucket(limits, method)
+        url = self.url(path, limits.region)
+
+        for attempt in range(self.max_retries + 1):
+            acquire_all([limits.app_bucket, method_bucket])
+            self._count(limits, 'requests')
+            try:
+                res = self._session().get(url, params=params, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                print(f"⏳ Request failed on {path} (attempt {attempt + 1}/{self.max_retries + 1}): {e}")
+                self._count(limits, 'retries')
+                time.sleep(min(2 ** attempt, 30))
+                continue
+
+            self._update_limits(res, limits, method_bucket)
+
+            if res.status_code == 200:
+                self._count(limits, 'ok')
+                return res.json()
+
+            if res.status_code == 429:
+                self._count(limits, 'rate_limited')
+                self._count(limits, 'retries')
+                retry_after = float(res.headers.get('Retry-After', 2 ** attempt))
+                # Method limits only block that method; app or service limits block the region
+                if res.headers.get('X-Rate-Limit-Type') == 'method':
+                    method_bucket.block_for(retry_after)
+                else:
+                    limits.app_bucket.block_for(retry_after)
+                continue
+
+            if res.status_code >= 500:
+                self._count(limits, 'retries')
+                time.sleep(min(2 ** attempt, 30))
+                continue
+
+            # 4xx other than 429 won't get better by retrying
+            self._count(limits, 'errors')
+            print(f"❌ {res.status_code} from {path}")
+            return None
+
+        self._count(limits, 'errors')
+        print(f"❌ Giving up on {path} after {self.max_retries + 1} attempts")
+        return None
+
+    def submit(self, path, method, params=None, region=None):
+        return self._region(region).executor.submit(self.get, path, method, params, region)
+
+    def map(self, fn, items, region_of=None, failure=None):
+        """
+        Runs fn over items, yielding (item, result) as they complete.
+        fn normally wraps one or more client.get calls. With region_of, each item
+        runs on its own region's pool, so a multi-region batch gets every
+        cluster's throughput at once. If fn or region_of raises (e.g. on an
+        unexpected payload or platform), the error is printed and (item, failure)
+        is yielded instead, so one bad item doesn't end the whole batch.
+        """
+        futures = {}
+        for item in items:
+            try:
+                region = region_of(item) if region_of else None
+            except Exception as e:
+                # e.g. a match ID with an unknown platform prefix
+                print(f"❌ {item}: {type(e).__name__}: {e}")
+                yield item, failure
+                continue
+            futures[self._region(region).executor.submit(fn, item)] = item
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ {item}: {type(e).__name__}: {e}")
+                result = failure
+            yield item, result
+
+    def throughput(self):
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        with self.lock:
+            per_region = {region: dict(limits.stats) for region, limits in self.regions.items()}
+        stats = {key: sum(r[key] for r in per_region.values()) for key in
+                 ['requests', 'ok', 'errors', 'retries', 'rate_limited']}
+        stats['elapsed_seconds'] = round(elapsed, 2)
+        stats['requests_per_second'] = round(stats['requests'] / elapsed, 2)
+        stats['ok_per_second'] = round(stats['ok'] / elapsed, 2)
+        stats['regions'] = per_region
+        return stats
+
+    def report(self):
+        stats = self.throughput()
+        print(
+            f"📡 API: {stats['requests']} requests in {stats['elapsed_seconds']}s "
+            f"({stats['requests_per_second']} req/s), {stats['rate_limited']} rate limited, "
+            f"{stats['retries']} retries, {stats['errors']} errors"
+        )
+        if len(stats['regions']) > 1:
+            for region, region_stats in sorted(stats['regions'].items()):
+                print(f"   🌍 {region}: {region_stats['requests']} requests, {region_stats['rate_limited']} rate limited")
+        cache_stats = get_cache().stats()
+        print(
+            f"🗄️ Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['evictions']} evicted"
+        )
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RiotClient()
+        return _client
+
+def find_local_timeline(match_id):
+    """
+    Returns True if the batch crawler already stored this match's timeline.
+    """
+    store = get_timeline_store()
+    if match_id not in store:
+        store.refresh()
+    return match_id in store
 
 def get_match_data(match_id):
-    url = f"https://{ROUTING}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-    res = requests.get(url, headers=HEADERS)
-    return res.json() if res.status_code == 200 else None
+    cache = get_cache()
+    data = cache.get('match', match_id)
+    if data is None:
+        data = get_client().get(
+            f"/lol/match/v5/matches/{match_id}", method='match', region=region_for_match_id(match_id)
+        )
+        if data:
+            cache.put('match', match_id, data)
+    return data
+
+def get_timeline_data(match_id, use_local=True):
+    """
+    Timelines live only in the timeline store: they're the largest payload, and
+    in the response cache they'd be stored twice and crowd match responses out
+    of its LRU budget. A timeline fetched from the API is stored before returning.
+    """
+    store = get_timeline_store()
+    if use_local and find_local_timeline(match_id):
+        return store.get(match_id)
+
+    data = get_client().get(
+        f"/lol/match/v5/matches/{match_id}/timeline", method='timeline', region=region_for_match_id(match_id)
+    )
+    if data:
+        store.put(match_id, data)
+    return data
+
+def get_puuid_by_riot_id(game_name, tag_line, region=None):
+    data = get_client().get(
+        f"/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}", method='account',
+        region=account_region_for(region or ROUTING)
+    )
+    return data['puuid'] if data else None
+
+def get_match_ids(puuid, start=0, count=50, start_time=None, region=None):
+    """One page of a summoner's ranked match IDs, newest first; None if the request failed."""
+    params = {'type': 'ranked', 'start': start, 'count': count}
+    if start_time is not None:
+        params['startTime'] = start_time
+    return get_client().get(
+        f"/lol/match/v5/matches/by-puuid/{puuid}/ids", method='match_ids', params=params, region=region
+    )
 
-def get_timeline_data(match_id):
-    url = f"https://{ROUTING}.api.riotgames.com/lol/match/v5/matches/{match_id}/timeline"
-    res = requests.get(url, headers=HEADERS)
-    return res.json() if res.status_code == 200 else None
+def parse_roster_line(line):
+    """
+    Roster lines are `Name#TAG` or `Name#TAG,PLATFORM` (e.g. `Faker#KR1,KR`).
+    Returns (riot_id, platform); platform defaults to RIOT_PLATFORM.
+    """
+    riot_id, _, platform = line.partition(',')
+    return riot_id.strip(), (platform.strip() or DEFAULT_PLATFORM).upper()
 
 def normalize_summoner(s):
     s = s.replace('_', ' ')
     return s.replace('-', '#') if '#' not in s and '-' in s else s
 
+def build_match_row(match_data, riot_id_full):
+    """
+    Turns a match-v5 payload into a midlane match row for riot_id_full.
+    Returns None if the summoner isn't in the match or didn't play mid.
+    """
+    info = match_data['info']
+    participants = info['participants']
+    match_id = match_data['metadata']['matchId']
+
+    if "#" not in riot_id_full:
+        print(f"❌ Invalid Riot ID format: {riot_id_full}")
+        return None
+
+    game_name, tag_line = riot_id_full.split("#")
+    this_player = None
+    opponent_mid = None
+
+    for p in participants:
+        if (
+            p.get('riotIdGameName', '').lower() == game_name.lower() and
+            p.get('riotIdTagline', '').lower() == tag_line.lower()
+        ):
+            if p['lane'] != 'MIDDLE':
+                return None  # Skip if not a mid lane game
+            this_player = p
+            break
+
+    if not this_player:
+        print(f"❌ Summoner {riot_id_full} not found in match {match_id}")
+        return None
+
+    for p in participants:
+        if p['lane'] == 'MIDDLE' and p['teamId'] != this_player['teamId']:
+            opponent_mid = p
+            break
+
+    opp_riot_id = (
+        f"{opponent_mid.get('riotIdGameName')}#{opponent_mid.get('riotIdTagline')}"
+        if opponent_mid else None
+    )
+
+    return {
+        'match_id': match_id,
+        'champion': this_player['championName'],
+        'participant_id': this_player['participantId'],
+        'opp_participant_id': opponent_mid['participantId'] if opponent_mid else None,
+        'win': this_player['win'],
+        'kills': this_player['kills'],
+        'deaths': this_player['deaths'],
+        'assists': this_player['assists'],
+        'cs': this_player['totalMinionsKilled'] + this_player['neutralMinionsKilled'],
+        'duration': info['gameDuration'],
+        'opp_kills': opponent_mid['kills'] if opponent_mid else 0,
+        'opp_deaths': opponent_mid['deaths'] if opponent_mid else 1,
+        'opp_assists': opponent_mid['assists'] if opponent_mid else 0,
+        'opp_cs': opponent_mid['totalMinionsKilled'] + opponent_mid['neutralMinionsKilled'] if opponent_mid else 0,
+        'opp_champion': opponent_mid['championName'] if opponent_mid else '',
+        'opp_summoner': opp_riot_id
+    }
+
 def extract_participants(info, riot_id):
     game_name, tag_line = riot_id.split("#")
 
@@ -56,5 +480,3 @@ def extract_participants(info, riot_id):
             )
 
     return this_player, opponent
-
-
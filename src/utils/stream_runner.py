@@ -0,0 +1,145 @@
+import time
+import queue
+import threading
+
+_DONE = object()
+
+
+class StreamStage:
+    """
+    One step of a streaming pipeline. fn takes an item (or, with batch_size, a
+    list of up to batch_size items) and returns an iterable of items for the next
+    stage. workers threads pull from the stage's inbox, which holds at most
+    maxsize items; a full inbox blocks the stage feeding it, so memory stays
+    bounded however far ahead the source runs. A batch is handed over early if
+    no new item arrives within flush_seconds.
+    """
+    __slots__ = ('name', 'fn', 'workers', 'maxsize', 'batch_size', 'flush_seconds')
+
+    def __init__(self, name, fn, workers=1, maxsize=32, batch_size=None, flush_seconds=5.0):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+
+class StageStats:
+    __slots__ = ('items_in', 'items_out', 'errors', 'busy_seconds', 'max_queued')
+
+    def __init__(self):
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queued = 0
+
+
+def _next_batch(inbox, stage):
+    """Up to batch_size items and whether the end-of-stream marker was reached."""
+    item = inbox.get()
+    if item is _DONE:
+        return [], True
+    batch = [item]
+    while len(batch) < stage.batch_size:
+        try:
+            item = inbox.get(timeout=stage.flush_seconds)
+        except queue.Empty:
+            break
+        if item is _DONE:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+def run_stream(source, stages):
+    """
+    Feeds source through stages, each on its own worker threads joined by bounded
+    queues, so network-bound and CPU-bound stages overlap. An item whose fn raises
+    is logged and dropped; the stream keeps going. Returns {stage name: StageStats}.
+    """
+    inboxes = [queue.Queue(maxsize=stage.maxsize) for stage in stages]
+    stats = {stage.name: StageStats() for stage in stages}
+    lock = threading.Lock()
+    remaining = [stage.workers for stage in stages]
+
+    def send(i, item):
+        if i == len(stages):
+            return
+        inboxes[i].put(item)
+        depth = inboxes[i].qsize()
+        with lock:
+            stats[stages[i].name].max_queued = max(stats[stages[i].name].max_queued, depth)
+
+    def close(i):
+        # The last worker of stage i - 1 to finish tells every worker of stage i
+        if i < len(stages):
+            for _ in range(stages[i].workers):
+                inboxes[i].put(_DONE)
+
+    def feed():
+        try:
+            for item in source:
+                send(0, item)
+        except Exception as e:
+            print(f"❌ Stream source failed: {type(e).__name__}: {e}")
+        finally:
+            close(0)
+
+    def work(i):
+        stage, inbox, stage_stats = stages[i], inboxes[i], stats[stages[i].name]
+        done = False
+        while not done:
+            if stage.batch_size:
+                item, done = _next_batch(inbox, stage)
+                if not item:
+                    continue
+                count = len(item)
+            else:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                count = 1
+
+            start = time.perf_counter()
+            try:
+                outputs = list(stage.fn(item) or ())
+            except Exception as e:
+                outputs = []
+                print(f"❌ {stage.name}: {type(e).__name__}: {e}")
+                with lock:
+                    stage_stats.errors += count
+            with lock:
+                stage_stats.items_in += count
+                stage_stats.items_out += len(outputs)
+                stage_stats.busy_seconds += time.perf_counter() - start
+            for output in outputs:
+                send(i + 1, output)
+
+        with lock:
+            remaining[i] -= 1
+            last = remaining[i] == 0
+        if last:
+            close(i + 1)
+
+    threads = [threading.Thread(target=feed, name='stream-source', daemon=True)]
+    for i, stage in enumerate(stages):
+        threads += [
+            threading.Thread(target=work, args=(i,), name=f"stream-{stage.name}-{n}", daemon=True)
+            for n in range(stage.workers)
+        ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        # Short joins keep Ctrl-C responsive in the main thread
+        while thread.is_alive():
+            thread.join(0.5)
+    return stats
+
+
+def print_stream_stats(stats, elapsed):
+    print(f"{'stage':<16} {'in':>8} {'out':>8} {'errors':>7} {'busy s':>9} {'max queued':>11}")
+    for name, s in stats.items():
+        print(f"{name:<16} {s.items_in:>8} {s.items_out:>8} {s.errors:>7} {s.busy_seconds:>9.2f} {s.max_queued:>11}")
+    print(f"⏱️ Stream finished in {elapsed:.1f}s")
@@ -0,0 +1,181 @@
+import os
+import sys
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 — pandas' Parquet engine
+    HAVE_PARQUET = True
+except ImportError:
+    HAVE_PARQUET = False
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+EXTENSIONS = {'parquet': '.parquet', 'csv': '.csv'}
+
+# Parquet unless told otherwise; CSV stays available for spreadsheets and older tooling
+DEFAULT_FORMAT = os.getenv('PIPELINE_DATA_FORMAT', 'parquet' if HAVE_PARQUET else 'csv')
+
+_TRUE = {'true', '1', 'yes'}
+_FALSE = {'false', '0', 'no'}
+
+
+def _to_boolean(series):
+    if series.dtype == 'boolean':
+        return series
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return series.astype('boolean')
+    # CSV round-trips booleans as text
+    text = series.astype('string').str.strip().str.lower()
+    return text.map(lambda v: True if v in _TRUE else False if v in _FALSE else pd.NA).astype('boolean')
+
+
+def apply_schema(df, schema):
+    """
+    Casts the schema's columns to their declared dtypes and puts them first, in
+    schema order. Columns the schema doesn't know about (e.g. one-hot encodings)
+    are kept as they are, after the declared ones.
+    """
+    if not schema:
+        return df
+    df = df.copy()
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        if dtype == 'boolean':
+            df[column] = _to_boolean(df[column])
+        elif dtype == 'Int64' and not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column].replace({'': None, 'None': None}), errors='coerce').astype('Int64')
+        elif dtype == 'float64' and not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column].replace({'': None, 'None': None}), errors='coerce')
+        else:
+            df[column] = df[column].astype(dtype)
+    declared = [c for c in schema if c in df.columns]
+    return df[declared + [c for c in df.columns if c not in schema]]
+
+
+def table_path(name, fmt=None, data_dir=DATA_DIR):
+    return os.path.join(data_dir, name + EXTENSIONS[fmt or DEFAULT_FORMAT])
+
+
+def find_table(name, data_dir=DATA_DIR):
+    """Path of the table in the default format, falling back to any other copy (e.g. a legacy CSV)."""
+    formats = [DEFAULT_FORMAT] + [fmt for fmt in EXTENSIONS if fmt != DEFAULT_FORMAT]
+    for fmt in formats:
+        path = table_path(name, fmt, data_dir)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_path(path, schema=None):
+    if path.endswith(EXTENSIONS['parquet']):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    return apply_schema(df, schema)
+
+
+def read_table(name, schema=None, data_dir=DATA_DIR):
+    """Loads a pipeline table by name, e.g. 'merged_data'."""
+    path = find_table(name, data_dir)
+    if path is None:
+        raise FileNotFoundError(f"No {name} table in {data_dir}")
+    return read_path(path, schema)
+
+
+def iter_table(name, schema=None, batch_rows=100_000, data_dir=DATA_DIR):
+    """Yields a table as DataFrames of at most batch_rows rows, without loading it whole."""
+    path = find_table(name, data_dir)
+    if path is None:
+        raise FileNotFoundError(f"No {name} table in {data_dir}")
+    if path.endswith(EXTENSIONS['parquet']):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+            yield apply_schema(batch.to_pandas(), schema)
+    else:
+        for chunk in pd.read_csv(path, chunksize=batch_rows):
+            yield apply_schema(chunk, schema)
+
+
+def write_table(df, name, schema=None, fmt=None, data_dir=DATA_DIR):
+    """Writes a pipeline table with its schema applied; returns the path written."""
+    fmt = fmt or DEFAULT_FORMAT
+    df = apply_schema(df, schema)
+    path = table_path(name, fmt, data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def write_arrays(name, data_dir=DATA_DIR, **arrays):
+    """Stores named NumPy arrays together as data/{name}.npz; returns the path."""
+    import numpy as np
+    path = os.path.join(data_dir, name + '.npz')
+    os.makedirs(data_dir, exist_ok=True)
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def read_arrays(name, data_dir=DATA_DIR):
+    """The arrays saved by write_arrays, as a dict; FileNotFoundError if absent."""
+    import numpy as np
+    with np.load(os.path.join(data_dir, name + '.npz'), allow_pickle=False) as npz:
+        return {key: npz[key] for key in npz.files}
+
+
+class TableWriter:
+    """
+    Writes a table one DataFrame chunk at a time, for outputs that don't fit in
+    memory. Every chunk is conformed to the first chunk's columns.
+    """
+
+    def __init__(self, name, schema=None, fmt=None, data_dir=DATA_DIR):
+        self.fmt = fmt or DEFAULT_FORMAT
+        self.schema = schema
+        self.path = table_path(name, self.fmt, data_dir)
+        self.columns = None
+        self.writer = None
+        self.rows = 0
+        os.makedirs(data_dir, exist_ok=True)
+
+    def write(self, df):
+        df = apply_schema(df, self.schema)
+        first = self.columns is None
+        if first:
+            self.columns = list(df.columns)
+        df = df.reindex(columns=self.columns)
+        if self.fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, schema=None if first else self.writer.schema, preserve_index=False)
+            if first:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='w' if first else 'a', header=first, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self.columns is None:
+            # Nothing was written; still leave an empty table with the schema's columns
+            self.write(pd.DataFrame(columns=list(self.schema or [])))
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == '__main__':
+    # Export tables to CSV next to their Parquet copies: python utils/table_io.py merged_data labeled_data
+    for table in sys.argv[1:]:
+        out = table_path(table, 'csv')
+        read_table(table).to_csv(out, index=False)
+        print(f"✅ Exported {table} → {out}")
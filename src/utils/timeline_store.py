@@ -0,0 +1,225 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+
+DEFAULT_STORE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'timeline_store'))
+PACK_FILE = 'timelines.pack'
+INDEX_FILE = 'index.jsonl'
+
+
+def legacy_timeline_key(summoner, match_id):
+    # Same shape as the old `{summoner}__{match_id}_timeline.json` file names, minus the suffix
+    return f"{summoner.replace(' ', '_').replace('#', '-')}__{match_id}"
+
+
+class TimelineStore:
+    """
+    Append-only store of compressed timelines.
+
+    Each timeline is serialised as compact JSON, zlib-compressed and appended to
+    one pack file. An append-only JSON-lines index maps each key to its offset and
+    length, so a read is one seek plus one decompress. Writing the same key again
+    appends a new record; the latest index entry wins.
+
+    Timelines are keyed by match ID, so a game shared by several tracked
+    summoners is stored once; who played in it lives in the match store.
+    Callers only use keys and dicts; the on-disk format stays private to this module.
+
+    Each index entry also records a SHA-1 of the timeline's JSON, so callers can
+    tell whether a stored timeline changed without reading it.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, compress_level=6):
+        self.root = root
+        self.compress_level = compress_level
+        self.pack_path = os.path.join(root, PACK_FILE)
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.lock = threading.Lock()
+        self.index = {}
+        self.index_pos = 0
+        self.reader = None
+        self.writer = None
+        self.index_writer = None
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'rb') as f:
+            f.seek(self.index_pos)
+            for line in f:
+                # A crash mid-write can leave a torn last line; stop there and pick it up later
+                if not line.endswith(b'\n'):
+                    break
+                entry = json.loads(line)
+                self.index[entry['key']] = (entry['offset'], entry['length'], entry['size'], entry.get('hash'))
+                self.index_pos += len(line)
+
+    def refresh(self):
+        """Picks up entries appended by another process since the index was loaded."""
+        with self.lock:
+            self._load_index()
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def keys(self):
+        return list(self.index)
+
+    def _read_record(self, key):
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        offset, length = entry[:2]
+        if self.writer:
+            self.writer.flush()
+        if self.reader is None:
+            self.reader = open(self.pack_path, 'rb')
+        self.reader.seek(offset)
+        return self.reader.read(length)
+
+    def get_bytes(self, key):
+        """Returns the timeline's raw JSON bytes, or None if the key isn't stored."""
+        with self.lock:
+            record = self._read_record(key)
+            if record is None:
+                self._load_index()
+                record = self._read_record(key)
+        return zlib.decompress(record) if record is not None else None
+
+    def iter_chunks(self, key, chunk_size=1 << 16):
+        """
+        Yields the timeline's JSON bytes in pieces of at most chunk_size, reading
+        and decompressing incrementally so the whole document is never in memory.
+        """
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None:
+                self._load_index()
+                entry = self.index.get(key)
+            if entry is not None and self.writer:
+                self.writer.flush()
+        if entry is None:
+            return
+
+        offset, length = entry[:2]
+        decompressor = zlib.decompressobj()
+        # A private handle keeps concurrent streams from fighting over one file position
+        with open(self.pack_path, 'rb') as f:
+            f.seek(offset)
+            remaining = length
+            while remaining:
+                data = f.read(min(chunk_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                while data:
+                    out = decompressor.decompress(data, chunk_size)
+                    if out:
+                        yield out
+                    data = decompressor.unconsumed_tail
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+    def content_hash(self, key):
+        """
+        SHA-1 of the stored timeline's JSON, or None if the key isn't stored.
+        Records written before hashes were indexed are hashed on demand;
+        compact() persists their hashes.
+        """
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        if entry[3] is None:
+            raw = self.get_bytes(key)
+            with self.lock:
+                self.index[key] = (*entry[:3], hashlib.sha1(raw).hexdigest())
+            entry = self.index[key]
+        return entry[3]
+
+    def get(self, key):
+        raw = self.get_bytes(key)
+        return json.loads(raw) if raw is not None else None
+
+    def put(self, key, timeline):
+        raw = json.dumps(timeline, separators=(',', ':')).encode('utf-8')
+        self.put_bytes(key, raw)
+
+    def put_bytes(self, key, raw):
+        record = zlib.compress(raw, self.compress_level)
+        digest = hashlib.sha1(raw).hexdigest()
+        with self.lock:
+            if self.writer is None:
+                os.makedirs(self.root, exist_ok=True)
+                self.writer = open(self.pack_path, 'ab')
+                self.index_writer = open(self.index_path, 'a', encoding='utf-8')
+            offset = self.writer.seek(0, os.SEEK_END)
+            self.writer.write(record)
+            # The record must be on disk before the index points at it
+            self.writer.flush()
+            entry = {'key': key, 'offset': offset, 'length': len(record), 'size': len(raw), 'hash': digest}
+            self.index_writer.write(json.dumps(entry) + '\n')
+            self.index_writer.flush()
+            self.index[key] = (offset, len(record), len(raw), digest)
+
+    def compact(self, keep=None):
+        """
+        Rewrites the pack with only the latest record of each key, dropping keys
+        for which keep(key) is false. Returns the number of bytes reclaimed.
+        """
+        before = self.disk_bytes()
+        tmp = TimelineStore(self.root + '.compact', self.compress_level)
+        for key in self.keys():
+            if keep is None or keep(key):
+                tmp.put_bytes(key, self.get_bytes(key))
+        tmp.close()
+
+        self.close()
+        for name in (PACK_FILE, INDEX_FILE):
+            src = os.path.join(tmp.root, name)
+            if os.path.exists(src):
+                os.replace(src, os.path.join(self.root, name))
+            elif os.path.exists(os.path.join(self.root, name)):
+                os.remove(os.path.join(self.root, name))
+        os.rmdir(tmp.root)
+
+        with self.lock:
+            self.index = {}
+            self.index_pos = 0
+            self._load_index()
+        return before - self.disk_bytes()
+
+    def disk_bytes(self):
+        return sum(
+            os.path.getsize(path) for path in (self.pack_path, self.index_path) if os.path.exists(path)
+        )
+
+    def close(self):
+        with self.lock:
+            for handle in (self.reader, self.writer, self.index_writer):
+                if handle:
+                    handle.close()
+            self.reader = self.writer = self.index_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_timeline_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TimelineStore()
+        return _store
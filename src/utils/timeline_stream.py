@@ -0,0 +1,61 @@
+import re
+import json
+import codecs
+
+_FRAMES_START = re.compile(r'"frames"\s*:\s*\[')
+_SEPARATORS = ' \t\r\n,'
+
+
+def iter_frames(chunks):
+    """
+    Yields the frames of a match-v5 timeline one at a time from an iterable of
+    JSON byte chunks (e.g. TimelineStore.iter_chunks).
+
+    Only the frame being decoded is held in memory: everything before the
+    `frames` array is skipped, and the buffer is trimmed after every frame, so
+    memory is bounded by the largest single frame rather than the game length.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buf = ''
+
+    # Skip ahead to the opening bracket of info.frames
+    while True:
+        match = _FRAMES_START.search(buf)
+        if match:
+            buf = buf[match.end():]
+            break
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        # Keep a short tail in case the key straddles two chunks
+        buf = buf[-32:] + text.decode(chunk)
+
+    pos = 0
+    while True:
+        while pos < len(buf) and buf[pos] in _SEPARATORS:
+            pos += 1
+
+        if pos < len(buf) and buf[pos] == ']':
+            return
+
+        if pos < len(buf):
+            try:
+                frame, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                frame = None
+            if frame is not None:
+                yield frame
+                buf = buf[end:]
+                pos = 0
+                continue
+
+        # Either the buffer is empty or it ends mid-frame; pull in more data
+        chunk = next(chunks, None)
+        if chunk is None:
+            if buf[pos:].strip():
+                raise ValueError("Timeline ended in the middle of a frame")
+            return
+        buf = buf[pos:] + text.decode(chunk)
+        pos = 0